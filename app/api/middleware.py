@@ -26,7 +26,8 @@ class RateLimiter:
         max_requests = max_requests or settings.RATE_LIMIT_REQUESTS
         window_seconds = window_seconds or settings.RATE_LIMIT_WINDOW
         
-        now = time.time()
+        # Monotonic: request spacing must not shift with wall-clock adjustments
+        now = time.monotonic()
         window_start = now - window_seconds
         
         # Initialize client if not exists
@@ -56,7 +57,7 @@ class RateLimiter:
                 'reset_time': None
             }
         
-        now = time.time()
+        now = time.monotonic()
         window_start = now - settings.RATE_LIMIT_WINDOW
         
         # Clean old requests
@@ -72,7 +73,8 @@ class RateLimiter:
         reset_time = None
         if recent_requests:
             oldest_request = min(recent_requests)
-            reset_time = oldest_request + settings.RATE_LIMIT_WINDOW
+            # Reported as an epoch timestamp for clients
+            reset_time = time.time() + (oldest_request + settings.RATE_LIMIT_WINDOW - now)
         
         return {
             'requests_made': requests_made,
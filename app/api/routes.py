@@ -9,7 +9,7 @@ from datetime import datetime
 
 from app.models.schemas import (
     GenerationRequest, GenerationResponse, HealthCheck,
-    GeneratedArtifact, SessionStatus
+    GeneratedArtifact, SessionStatus, AgentRole, BedrockModel, BEDROCK_PROVIDER
 )
 from app.core.exceptions import MetaGPTSystemException
 from app.core.logging import get_logger
@@ -19,6 +19,45 @@ from .dependencies import get_validated_request, get_services
 logger = get_logger(__name__)
 router = APIRouter()
 
+# Static display tables for the model and role listing endpoints
+_PROVIDER_NAMES = {
+    "anthropic": "Anthropic",
+    "meta": "Meta",
+    "mistral": "Mistral AI",
+    "cohere": "Cohere",
+    "amazon": "Amazon",
+}
+
+_MODEL_DISPLAY_NAMES = {
+    "CLAUDE_3_HAIKU": "Claude 3 Haiku",
+    "CLAUDE_3_SONNET": "Claude 3 Sonnet",
+    "CLAUDE_35_SONNET": "Claude 3.5 Sonnet",
+    "LLAMA3_8B": "Llama 3 8B",
+    "LLAMA3_70B": "Llama 3 70B",
+    "MISTRAL_7B": "Mistral 7B",
+    "MISTRAL_LARGE": "Mistral Large",
+    "COHERE_COMMAND_R": "Command R",
+    "COHERE_COMMAND_R_PLUS": "Command R+",
+}
+
+_ROLE_DESCRIPTIONS = {
+    AgentRole.PRODUCT_MANAGER: "Analyzes requirements, creates user stories, and defines product specifications",
+    AgentRole.ARCHITECT: "Designs system architecture, selects tech stack, and creates technical specifications",
+    AgentRole.PROJECT_MANAGER: "Creates project plans, manages timelines, and coordinates development activities",
+    AgentRole.ENGINEER: "Implements application code following architecture and best practices",
+    AgentRole.QA_ENGINEER: "Creates test strategies, writes test cases, and ensures quality standards",
+    AgentRole.DEVOPS: "Designs infrastructure, CI/CD pipelines, and deployment configurations",
+}
+
+_ROLE_DISPLAY_NAMES = {
+    AgentRole.PRODUCT_MANAGER: "Product Manager",
+    AgentRole.ARCHITECT: "System Architect",
+    AgentRole.PROJECT_MANAGER: "Project Manager",
+    AgentRole.ENGINEER: "Software Engineer",
+    AgentRole.QA_ENGINEER: "QA Engineer",
+    AgentRole.DEVOPS: "DevOps Engineer",
+}
+
 
 # Generation endpoints
 @router.post("/generate", response_model=GenerationResponse)
@@ -365,34 +404,12 @@ async def health_check(services: dict = Depends(get_services)):
 async def get_available_bedrock_models():
     """Get available Bedrock models"""
     try:
-        from app.models.schemas import BedrockModel
-        
-        provider_names = {
-            "anthropic": "Anthropic",
-            "meta": "Meta",
-            "mistral": "Mistral AI",
-            "cohere": "Cohere",
-            "amazon": "Amazon",
-        }
-
-        model_display_names = {
-            "CLAUDE_3_HAIKU": "Claude 3 Haiku",
-            "CLAUDE_3_SONNET": "Claude 3 Sonnet",
-            "CLAUDE_35_SONNET": "Claude 3.5 Sonnet",
-            "LLAMA3_8B": "Llama 3 8B",
-            "LLAMA3_70B": "Llama 3 70B",
-            "MISTRAL_7B": "Mistral 7B",
-            "MISTRAL_LARGE": "Mistral Large",
-            "COHERE_COMMAND_R": "Command R",
-            "COHERE_COMMAND_R_PLUS": "Command R+",
-        }
-
         models = []
         try:
             for model in BedrockModel:
-                prefix = model.value.split(".")[0]
-                provider = provider_names.get(prefix, prefix.title())
-                display_name = model_display_names.get(model.name, model.name.replace("_", " ").title())
+                prefix = BEDROCK_PROVIDER[model]
+                provider = _PROVIDER_NAMES.get(prefix, prefix.title())
+                display_name = _MODEL_DISPLAY_NAMES.get(model.name, model.name.replace("_", " ").title())
                 models.append({
                     "id": model.value,
                     "name": display_name,
@@ -427,31 +444,11 @@ async def get_available_bedrock_models():
 async def get_agent_roles_endpoint():
     """Get available agent roles"""
     try:
-        from app.models.schemas import AgentRole
-        
-        role_descriptions = {
-            AgentRole.PRODUCT_MANAGER: "Analyzes requirements, creates user stories, and defines product specifications",
-            AgentRole.ARCHITECT: "Designs system architecture, selects tech stack, and creates technical specifications",
-            AgentRole.PROJECT_MANAGER: "Creates project plans, manages timelines, and coordinates development activities",
-            AgentRole.ENGINEER: "Implements application code following architecture and best practices",
-            AgentRole.QA_ENGINEER: "Creates test strategies, writes test cases, and ensures quality standards",
-            AgentRole.DEVOPS: "Designs infrastructure, CI/CD pipelines, and deployment configurations",
-        }
-        
-        role_display_names = {
-            AgentRole.PRODUCT_MANAGER: "Product Manager",
-            AgentRole.ARCHITECT: "System Architect",
-            AgentRole.PROJECT_MANAGER: "Project Manager",
-            AgentRole.ENGINEER: "Software Engineer",
-            AgentRole.QA_ENGINEER: "QA Engineer",
-            AgentRole.DEVOPS: "DevOps Engineer",
-        }
-        
         roles = [
             {
                 "id": role.value,
-                "name": role_display_names.get(role, role.name.replace('_', ' ').title()),
-                "description": role_descriptions.get(role, role.value.replace('_', ' ').title())
+                "name": _ROLE_DISPLAY_NAMES.get(role, role.name.replace('_', ' ').title()),
+                "description": _ROLE_DESCRIPTIONS.get(role, role.value.replace('_', ' ').title())
             }
             for role in AgentRole
         ]
@@ -39,6 +39,7 @@ class Settings(BaseSettings):
     METAGPT_CONFIG_DIR: str = Field(default_factory=lambda: "/tmp/metagpt_config" if os.getenv("VERCEL") or os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "./metagpt_config")
     OPENAI_API_KEY: str = Field(default="")
     ANTHROPIC_API_KEY: str = Field(default="")
+    MAX_CONCURRENT_GENERATIONS: int = Field(default=3, ge=1, le=50)
 
     # E2B
     E2B_API_KEY: str = Field(default="")
@@ -46,6 +47,8 @@ class Settings(BaseSettings):
     E2B_TIMEOUT: int = Field(default=1800, ge=300, le=3600)
     E2B_CPU_LIMIT: int = Field(default=2, ge=1, le=8)
     E2B_MEMORY_LIMIT: int = Field(default=2048, ge=512, le=8192)
+    E2B_POOL_SIZE: int = Field(default=0, ge=0, le=10)
+    E2B_PREWARM_SANDBOXES: bool = Field(default=False)
 
     # Session
     SESSION_TIMEOUT: int = Field(default=7200, ge=300, le=86400)
@@ -2,11 +2,17 @@
 Enhanced Pydantic models for production-ready API requests and responses
 """
 
-from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Dict, Any
+from functools import partial
+from types import MappingProxyType
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Any, Mapping
 from enum import Enum
 from datetime import datetime
 
+class SchemaModel(BaseModel):
+    """Base for API models; validators are built on first use, not at import"""
+    model_config = ConfigDict(defer_build=True)
+
 class AgentRole(str, Enum):
     """Available MetaGPT agent roles"""
     PRODUCT_MANAGER = "product_manager"
@@ -16,6 +22,13 @@ class AgentRole(str, Enum):
     QA_ENGINEER = "qa_engineer"
     DEVOPS = "devops"
 
+# Roles used when a request does not specify ``active_agents``
+_DEFAULT_ACTIVE_AGENTS: tuple[AgentRole, ...] = (
+    AgentRole.PRODUCT_MANAGER,
+    AgentRole.ARCHITECT,
+    AgentRole.ENGINEER,
+)
+
 class BedrockModel(str, Enum):
     """Available AWS Bedrock models (us-east-1, ON_DEMAND + INFERENCE_PROFILE)"""
     # Anthropic Claude (ON_DEMAND)
@@ -32,6 +45,19 @@ class BedrockModel(str, Enum):
     COHERE_COMMAND_R = "cohere.command-r-v1:0"
     COHERE_COMMAND_R_PLUS = "cohere.command-r-plus-v1:0"
 
+# Model family per BedrockModel; drives request/response format dispatch
+BEDROCK_PROVIDER: Mapping[BedrockModel, str] = MappingProxyType({
+    BedrockModel.CLAUDE_3_HAIKU: "anthropic",
+    BedrockModel.CLAUDE_3_SONNET: "anthropic",
+    BedrockModel.CLAUDE_35_SONNET: "anthropic",
+    BedrockModel.LLAMA3_8B: "meta",
+    BedrockModel.LLAMA3_70B: "meta",
+    BedrockModel.MISTRAL_7B: "mistral",
+    BedrockModel.MISTRAL_LARGE: "mistral",
+    BedrockModel.COHERE_COMMAND_R: "cohere",
+    BedrockModel.COHERE_COMMAND_R_PLUS: "cohere",
+})
+
 class AppType(str, Enum):
     """Types of applications that can be generated"""
     WEB_APP = "web_app"
@@ -47,7 +73,7 @@ class Priority(str, Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
-class GenerationRequest(BaseModel):
+class GenerationRequest(SchemaModel):
     """Enhanced request model for app generation"""
     requirement: str = Field(
         ..., 
@@ -63,16 +89,16 @@ class GenerationRequest(BaseModel):
         default=BedrockModel.CLAUDE_3_HAIKU,
         description="Preferred Bedrock model"
     )
-    active_agents: List[AgentRole] = Field(
-        default_factory=lambda: [AgentRole.PRODUCT_MANAGER, AgentRole.ARCHITECT, AgentRole.ENGINEER], 
+    active_agents: list[AgentRole] = Field(
+        default_factory=partial(list, _DEFAULT_ACTIVE_AGENTS),
         description="Agents to include in generation"
     )
-    additional_requirements: Optional[str] = Field(
+    additional_requirements: str | None = Field(
         None, 
         description="Additional specific requirements",
         max_length=10000
     )
-    tech_stack_preferences: Optional[List[str]] = Field(
+    tech_stack_preferences: list[str] | None = Field(
         None, 
         description="Preferred technologies/frameworks",
         max_length=10
@@ -97,97 +123,105 @@ class GenerationRequest(BaseModel):
                 raise ValueError("Maximum 10 technology preferences allowed")
         return v
 
-class AgentUpdate(BaseModel):
+class AgentUpdate(SchemaModel):
     """Real-time agent update model"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     agent_role: AgentRole
     status: str
     message: str
     progress: int = Field(ge=0, le=100)
     timestamp: datetime = Field(default_factory=datetime.now)
-    artifacts: Optional[List[str]] = None
-    current_task: Optional[str] = None
-    estimated_completion: Optional[datetime] = None
+    artifacts: list[str] | None = None
+    current_task: str | None = None
+    estimated_completion: datetime | None = None
 
-class GenerationResponse(BaseModel):
+class GenerationResponse(SchemaModel):
     """Enhanced response model for app generation"""
     generation_id: str = Field(..., description="Unique generation session ID")
     status: str = Field(..., description="Current generation status")
     message: str = Field(..., description="Status message")
     progress: int = Field(ge=0, le=100, description="Progress percentage")
-    stream_url: Optional[str] = Field(None, description="SSE stream URL for real-time updates")
-    estimated_completion: Optional[datetime] = Field(None, description="Estimated completion time")
-    active_agents: Optional[List[str]] = Field(None, description="List of active agent roles")
+    stream_url: str | None = Field(None, description="SSE stream URL for real-time updates")
+    estimated_completion: datetime | None = Field(None, description="Estimated completion time")
+    active_agents: list[str] | None = Field(None, description="List of active agent roles")
 
-class GeneratedArtifact(BaseModel):
+class GeneratedArtifact(SchemaModel):
     """Enhanced model for generated artifacts"""
     id: str = Field(..., description="Unique artifact ID")
     name: str = Field(..., description="Artifact filename")
     type: str = Field(..., description="Artifact type (code, documentation, configuration)")
     content: str = Field(..., description="Artifact content")
     agent_role: str = Field(..., description="Agent that created this artifact")
-    file_path: Optional[str] = Field(None, description="Relative file path")
-    size: Optional[int] = Field(None, description="Content size in bytes")
-    created_at: Optional[datetime] = Field(None, description="Creation timestamp")
-    language: Optional[str] = Field(None, description="Programming language or format")
-    dependencies: Optional[List[str]] = Field(None, description="File dependencies")
+    file_path: str | None = Field(None, description="Relative file path")
+    size: int | None = Field(None, description="Content size in bytes")
+    created_at: datetime | None = Field(None, description="Creation timestamp")
+    language: str | None = Field(None, description="Programming language or format")
+    dependencies: list[str] | None = Field(None, description="File dependencies")
 
-class SessionStatus(BaseModel):
+class SessionStatus(SchemaModel):
     """Enhanced session status model"""
     session_id: str
     status: str
     progress: int = Field(ge=0, le=100)
     message: str
     created_at: datetime
-    updated_at: Optional[datetime] = None
-    estimated_completion: Optional[datetime] = None
-    current_agent: Optional[str] = None
-    agents: List[Dict[str, Any]] = Field(default_factory=list)
-    sandbox: Optional[Dict[str, Any]] = None
-    metrics: Dict[str, Any] = Field(default_factory=dict)
+    updated_at: datetime | None = None
+    estimated_completion: datetime | None = None
+    current_agent: str | None = None
+    agents: list[dict[str, Any]] = Field(default_factory=list)
+    sandbox: dict[str, Any] | None = None
+    metrics: dict[str, Any] = Field(default_factory=dict)
     artifacts_count: int = 0
 
-class SandboxInfo(BaseModel):
+class SandboxInfo(SchemaModel):
     """E2B Sandbox information model"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     id: str
     session_id: str
     state: str
     created_at: datetime
     last_activity: datetime
-    project_type: Optional[str] = None
-    preview_url: Optional[str] = None
+    project_type: str | None = None
+    preview_url: str | None = None
     files_count: int = 0
     active_processes: int = 0
-    metrics: Dict[str, Any] = Field(default_factory=dict)
+    metrics: dict[str, Any] = Field(default_factory=dict)
 
-class ProcessInfo(BaseModel):
+class ProcessInfo(SchemaModel):
     """Process information model"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     id: str
     command: str
     state: str
     started_at: datetime
-    completed_at: Optional[datetime] = None
-    exit_code: Optional[int] = None
-    pid: Optional[int] = None
+    completed_at: datetime | None = None
+    exit_code: int | None = None
+    pid: int | None = None
 
-class LogEntry(BaseModel):
+class LogEntry(SchemaModel):
     """Log entry model"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     timestamp: datetime
     level: str
     source: str
     message: str
-    process_id: Optional[str] = None
+    process_id: str | None = None
 
-class SystemMetrics(BaseModel):
+class SystemMetrics(SchemaModel):
     """System metrics model"""
     active_sessions: int
     active_sandboxes: int
     active_connections: int
     total_agents: int
-    cpu_usage: Optional[float] = None
-    memory_usage: Optional[float] = None
-    disk_usage: Optional[float] = None
+    cpu_usage: float | None = None
+    memory_usage: float | None = None
+    disk_usage: float | None = None
 
-class HealthCheck(BaseModel):
+class HealthCheck(SchemaModel):
     """Enhanced health check response"""
     status: str = Field(..., description="Overall system status")
     service: str = Field(..., description="Service name")
@@ -195,57 +229,57 @@ class HealthCheck(BaseModel):
     aws_bedrock_available: bool = False
     metagpt_configured: bool = False
     e2b_configured: bool = False
-    services: Optional[Dict[str, Any]] = None
-    capacity: Optional[Dict[str, Any]] = None
+    services: dict[str, Any] | None = None
+    capacity: dict[str, Any] | None = None
 
-class ErrorResponse(BaseModel):
+class ErrorResponse(SchemaModel):
     """Standardized error response"""
     error: str
     message: str
-    details: Optional[Dict[str, Any]] = None
+    details: dict[str, Any] | None = None
     timestamp: datetime = Field(default_factory=datetime.now)
-    request_id: Optional[str] = None
+    request_id: str | None = None
 
 # Request/Response models for specific endpoints
 
-class CreateSandboxRequest(BaseModel):
+class CreateSandboxRequest(SchemaModel):
     """Request to create E2B sandbox"""
     template: str = Field(default="base", description="Sandbox template")
     timeout_minutes: int = Field(default=30, ge=5, le=120)
-    resource_limits: Optional[Dict[str, Any]] = None
+    resource_limits: dict[str, Any] | None = None
 
-class WriteFilesRequest(BaseModel):
+class WriteFilesRequest(SchemaModel):
     """Request to write files to sandbox"""
-    artifacts: List[Dict[str, Any]] = Field(..., min_length=1, max_length=200)
+    artifacts: list[dict[str, Any]] = Field(..., min_length=1, max_length=200)
     overwrite: bool = Field(default=True, description="Overwrite existing files")
 
-class RunApplicationRequest(BaseModel):
+class RunApplicationRequest(SchemaModel):
     """Request to run application in sandbox"""
-    command: Optional[str] = Field(None, description="Custom run command")
-    environment: Optional[Dict[str, str]] = Field(None, description="Environment variables")
+    command: str | None = Field(None, description="Custom run command")
+    environment: dict[str, str] | None = Field(None, description="Environment variables")
     working_directory: str = Field(default="/home/user/app", description="Working directory")
 
-class GetLogsRequest(BaseModel):
+class GetLogsRequest(SchemaModel):
     """Request to get logs from sandbox"""
-    process_id: Optional[str] = None
+    process_id: str | None = None
     lines: int = Field(default=100, ge=1, le=1000)
-    level: Optional[str] = Field(None, description="Log level filter")
-    since: Optional[datetime] = Field(None, description="Get logs since timestamp")
+    level: str | None = Field(None, description="Log level filter")
+    since: datetime | None = Field(None, description="Get logs since timestamp")
 
 # Configuration models
 
-class AgentConfig(BaseModel):
+class AgentConfig(SchemaModel):
     """Agent configuration model"""
     role: AgentRole
     enabled: bool = True
     timeout_minutes: int = Field(default=15, ge=1, le=60)
     max_retries: int = Field(default=3, ge=0, le=10)
-    custom_instructions: Optional[str] = None
-    tools: Optional[List[str]] = None
+    custom_instructions: str | None = None
+    tools: list[str] | None = None
 
-class GenerationConfig(BaseModel):
+class GenerationConfig(SchemaModel):
     """Generation configuration model"""
-    agents: List[AgentConfig]
+    agents: list[AgentConfig]
     model: BedrockModel = BedrockModel.CLAUDE_35_SONNET
     timeout_minutes: int = Field(default=30, ge=5, le=120)
     max_artifacts: int = Field(default=100, ge=1, le=500)
@@ -254,9 +288,9 @@ class GenerationConfig(BaseModel):
 
 # Validation models
 
-class ValidationResult(BaseModel):
+class ValidationResult(SchemaModel):
     """Validation result model"""
     valid: bool
-    errors: List[str] = Field(default_factory=list)
-    warnings: List[str] = Field(default_factory=list)
-    suggestions: List[str] = Field(default_factory=list)
\ No newline at end of file
+    errors: list[str] = Field(default_factory=list)
+    warnings: list[str] = Field(default_factory=list)
+    suggestions: list[str] = Field(default_factory=list)
\ No newline at end of file
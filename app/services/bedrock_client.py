@@ -3,21 +3,108 @@ AWS Bedrock client for AI model interactions
 """
 
 import boto3
+import hashlib
 import json
 import asyncio
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 from app.core.logging import get_logger
 from app.core.config import settings
-from app.models.schemas import BedrockModel
+from app.models.schemas import BedrockModel, BEDROCK_PROVIDER
+
+try:
+    import orjson
+except ImportError:  # optional speedup ("full" extra); stdlib json otherwise
+    orjson = None
 
 logger = get_logger(__name__)
 
+# Request/response codec: orjson when installed (bytes out, C parser), else stdlib
+_json_dumps: Callable[[Any], Any] = orjson.dumps if orjson else json.dumps
+_json_loads: Callable[[Any], Any] = orjson.loads if orjson else json.loads
+
+# Concurrent Bedrock calls: sizes both the HTTP connection pool and the worker threads
+_MAX_CONCURRENT_INVOCATIONS = 32
+
+_CLIENT_CONFIG = Config(
+    max_pool_connections=_MAX_CONCURRENT_INVOCATIONS,
+    retries={'mode': 'adaptive', 'max_attempts': 5},
+    tcp_keepalive=True,
+)
+
+# Response cache for near-deterministic calls (temperature at or below the limit)
+_RESPONSE_CACHE_SIZE = 1024
+_RESPONSE_CACHE_TTL = 3600  # seconds
+_CACHEABLE_MAX_TEMPERATURE = 0.2
+
+# Streamed text chunks buffered ahead of the consumer; the reader thread waits when full
+_STREAM_QUEUE_SIZE = 64
+# How often a blocked reader thread re-checks whether the consumer went away
+_STREAM_PUT_POLL_SECONDS = 0.5
+
+# Request body per provider: (prompt, max_tokens, temperature) -> body
+_BODY_BUILDERS: Dict[str, Callable[[str, int, float], Dict[str, Any]]] = {
+    "anthropic": lambda prompt, max_tokens, temperature: {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "messages": [{"role": "user", "content": prompt}]
+    },
+    "meta": lambda prompt, max_tokens, temperature: {
+        "prompt": prompt,
+        "max_gen_len": max_tokens,
+        "temperature": temperature,
+        "top_p": 0.9
+    },
+    "mistral": lambda prompt, max_tokens, temperature: {
+        "prompt": prompt,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "top_p": 0.9
+    },
+    "cohere": lambda prompt, max_tokens, temperature: {
+        "prompt": prompt,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "p": 0.9
+    },
+}
+
+# Generated text per provider response body
+_RESPONSE_PARSERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "anthropic": lambda body: body.get('content', [{}])[0].get('text', ''),
+    "meta": lambda body: body.get('generation', ''),
+    "mistral": lambda body: body.get('outputs', [{}])[0].get('text', ''),
+    "cohere": lambda body: body.get('generations', [{}])[0].get('text', ''),
+}
+
+# Generated text per decoded response-stream chunk
+_STREAM_PARSERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "anthropic": lambda chunk: (
+        chunk.get('delta', {}).get('text', '') if chunk.get('type') == 'content_block_delta' else ''
+    ),
+    "meta": lambda chunk: chunk.get('generation', ''),
+    "mistral": lambda chunk: chunk.get('outputs', [{}])[0].get('text', ''),
+    "cohere": lambda chunk: chunk.get('text') or chunk.get('generations', [{}])[0].get('text', ''),
+}
+
 class BedrockClient:
     """AWS Bedrock client wrapper"""
     
     def __init__(self):
         self.client = None
+        # Dedicated pool so Bedrock calls don't compete with the default executor
+        self._executor = ThreadPoolExecutor(
+            max_workers=_MAX_CONCURRENT_INVOCATIONS, thread_name_prefix='bedrock'
+        )
+        # (model, prompt digest, max_tokens, temperature) -> (expires_at, text), LRU ordered
+        self._response_cache: "OrderedDict[Tuple[str, bytes, int, float], Tuple[float, str]]" = OrderedDict()
         self._initialize_client()
     
     def _initialize_client(self):
@@ -34,6 +121,7 @@ class BedrockClient:
                 aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
                 aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
                 region_name=region,
+                config=_CLIENT_CONFIG,
             )
             logger.info("✅ AWS Bedrock client initialized successfully")
         except NoCredentialsError:
@@ -43,6 +131,35 @@ class BedrockClient:
             logger.error(f"❌ Failed to initialize Bedrock client: {e}")
             self.client = None
     
+    def _cache_get(self, key: Tuple[str, bytes, int, float]) -> Optional[str]:
+        """Return a cached response if present and not expired"""
+        entry = self._response_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at < time.monotonic():
+            del self._response_cache[key]
+            return None
+        self._response_cache.move_to_end(key)
+        return text
+    
+    def _cache_put(self, key: Tuple[str, bytes, int, float], text: str) -> None:
+        """Store a response, evicting the least recently used entry when full"""
+        self._response_cache[key] = (time.monotonic() + _RESPONSE_CACHE_TTL, text)
+        self._response_cache.move_to_end(key)
+        if len(self._response_cache) > _RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    def _invoke_blocking(self, model_id: BedrockModel, body: dict) -> dict:
+        """Call invoke_model and read the streamed response body (runs in a worker)"""
+        response = self.client.invoke_model(
+            modelId=model_id.value,
+            body=_json_dumps(body),
+            contentType='application/json',
+            accept='application/json'
+        )
+        return _json_loads(response['body'].read())
+    
     async def invoke_model(
         self, 
         model_id: BedrockModel, 
@@ -55,64 +172,39 @@ class BedrockClient:
             logger.error("Bedrock client not initialized")
             return None
         
+        # Sampled outputs vary by design; only near-deterministic calls are reused
+        cache_key = None
+        if temperature <= _CACHEABLE_MAX_TEMPERATURE:
+            cache_key = (
+                model_id.value,
+                hashlib.sha256(prompt.encode()).digest(),
+                max_tokens,
+                round(temperature, 2),
+            )
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.debug(f"Bedrock cache hit for {model_id.value}")
+                return cached
+        
+        provider = BEDROCK_PROVIDER.get(model_id)
         try:
             # Prepare request body based on model type
-            if model_id.value.startswith("us.anthropic.claude") or model_id.value.startswith("anthropic.claude"):
-                body = {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": max_tokens,
-                    "temperature": temperature,
-                    "messages": [{"role": "user", "content": prompt}]
-                }
-            elif model_id.value.startswith("us.meta.llama") or model_id.value.startswith("meta.llama"):
-                body = {
-                    "prompt": prompt,
-                    "max_gen_len": max_tokens,
-                    "temperature": temperature,
-                    "top_p": 0.9
-                }
-            elif model_id.value.startswith("mistral."):
-                body = {
-                    "prompt": prompt,
-                    "max_tokens": max_tokens,
-                    "temperature": temperature,
-                    "top_p": 0.9
-                }
-            elif model_id.value.startswith("cohere."):
-                body = {
-                    "prompt": prompt,
-                    "max_tokens": max_tokens,
-                    "temperature": temperature,
-                    "p": 0.9
-                }
-            else:
+            build_body = _BODY_BUILDERS.get(provider)
+            if build_body is None:
                 logger.error(f"Unsupported model: {model_id}")
                 return None
+            body = build_body(prompt, max_tokens, temperature)
             
-            # Make the API call
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.client.invoke_model(
-                    modelId=model_id.value,
-                    body=json.dumps(body),
-                    contentType='application/json',
-                    accept='application/json'
-                )
+            # Make the API call (request, body read and decode in one worker hop)
+            response_body = await asyncio.get_running_loop().run_in_executor(
+                self._executor, partial(self._invoke_blocking, model_id, body)
             )
             
             # Parse response based on model type
-            response_body = json.loads(response['body'].read())
-            
-            if model_id.value.startswith("us.anthropic.claude") or model_id.value.startswith("anthropic.claude"):
-                return response_body.get('content', [{}])[0].get('text', '')
-            elif model_id.value.startswith("us.meta.llama") or model_id.value.startswith("meta.llama"):
-                return response_body.get('generation', '')
-            elif model_id.value.startswith("mistral."):
-                return response_body.get('outputs', [{}])[0].get('text', '')
-            elif model_id.value.startswith("cohere."):
-                return response_body.get('generations', [{}])[0].get('text', '')
-            
-            return None
+            text = _RESPONSE_PARSERS[provider](response_body)
+            if cache_key is not None and text:
+                self._cache_put(cache_key, text)
+            return text
             
         except ClientError as e:
             logger.error(f"AWS Bedrock API error: {e}")
@@ -120,4 +212,89 @@ class BedrockClient:
         except Exception as e:
             logger.error(f"Unexpected error invoking Bedrock model: {e}")
             return None
-
+    
+    async def stream_model(
+        self,
+        model_id: BedrockModel,
+        prompt: str,
+        max_tokens: int = 2000,
+        temperature: float = 0.7
+    ) -> AsyncIterator[str]:
+        """Invoke a Bedrock model and yield generated text as it streams in"""
+        if not self.client:
+            logger.error("Bedrock client not initialized")
+            return
+        
+        provider = BEDROCK_PROVIDER.get(model_id)
+        build_body = _BODY_BUILDERS.get(provider)
+        if build_body is None:
+            logger.error(f"Unsupported model: {model_id}")
+            return
+        body = build_body(prompt, max_tokens, temperature)
+        parse_chunk = _STREAM_PARSERS[provider]
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_STREAM_QUEUE_SIZE)
+        stop = threading.Event()
+        done = object()
+        
+        def _emit(item: Any) -> bool:
+            # Wait for queue space; False once the consumer has stopped or the loop is gone
+            put = queue.put(item)
+            try:
+                future = asyncio.run_coroutine_threadsafe(put, loop)
+            except RuntimeError:
+                put.close()
+                return False
+            while True:
+                try:
+                    future.result(timeout=_STREAM_PUT_POLL_SECONDS)
+                    return True
+                except FutureTimeoutError:
+                    if stop.is_set():
+                        future.cancel()
+                        return False
+        
+        def _pump():
+            # Runs in a worker: read stream events and hand text back to the loop
+            stream = None
+            try:
+                response = self.client.invoke_model_with_response_stream(
+                    modelId=model_id.value,
+                    body=_json_dumps(body),
+                    contentType='application/json',
+                    accept='application/json'
+                )
+                stream = response['body']
+                for event in stream:
+                    if stop.is_set():
+                        break
+                    chunk = event.get('chunk')
+                    if chunk:
+                        text = parse_chunk(_json_loads(chunk['bytes']))
+                        if text and not _emit(text):
+                            break
+            except Exception as e:
+                _emit(e)
+            finally:
+                # Release the HTTP connection even when the consumer stopped early
+                if stream is not None:
+                    stream.close()
+                _emit(done)
+        
+        loop.run_in_executor(self._executor, _pump)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, ClientError):
+                    logger.error(f"AWS Bedrock API error: {item}")
+                    break
+                if isinstance(item, Exception):
+                    logger.error(f"Unexpected error streaming Bedrock model: {item}")
+                    break
+                yield item
+        finally:
+            # Consumer stopped early or stream ended; let the worker exit
+            stop.set()
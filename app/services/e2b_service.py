@@ -2,28 +2,100 @@
 Clean E2B service using modular components
 """
 
-from typing import Dict, List, Optional, Any
+import asyncio
+from typing import Dict, List, Optional, Any, Tuple
 
 from app.core.logging import get_logger
 from app.core.exceptions import SandboxException
+from app.core.config import settings
 from .sandbox import SandboxManager, SandboxConfig
 
 logger = get_logger(__name__)
 
 
+def _session_config(template: str) -> SandboxConfig:
+    """Sandbox config for a session; timeout matches what pooled sandboxes are booted for"""
+    return SandboxConfig(template_id=template, timeout=settings.E2B_TIMEOUT)
+
+
 class E2BService:
     """Clean E2B service interface"""
     
     def __init__(self):
         self.sandbox_manager = SandboxManager()
+        # session_id -> (template, creation task) for sandboxes started ahead of use
+        self._prewarm_tasks: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self.sandbox_manager.add_removal_callback(self._on_sandbox_removed)
+    
+    def prewarm_sandbox(self, session_id: str, template: str = "base") -> None:
+        """Start creating the session's sandbox in the background (opt-in)"""
+        if not settings.E2B_PREWARM_SANDBOXES or not settings.ENABLE_E2B or not settings.E2B_API_KEY:
+            return
+        if session_id in self._prewarm_tasks or self.sandbox_manager.get_sandbox_by_session(session_id):
+            return
+        
+        task = asyncio.create_task(
+            self.sandbox_manager.create_sandbox(session_id, _session_config(template))
+        )
+        task.add_done_callback(lambda t: self._on_prewarm_done(session_id, t))
+        self._prewarm_tasks[session_id] = (template, task)
+        logger.info(f"Prewarming sandbox for session {session_id}")
+    
+    def _on_prewarm_done(self, session_id: str, task: asyncio.Task) -> None:
+        """Drop failed prewarms so the next request creates a sandbox normally"""
+        if task.cancelled() or task.exception() is not None:
+            entry = self._prewarm_tasks.get(session_id)
+            if entry and entry[1] is task:
+                del self._prewarm_tasks[session_id]
+            if not task.cancelled():
+                logger.warning(f"Sandbox prewarm failed for session {session_id}: {task.exception()}")
+    
+    def _on_sandbox_removed(self, sandbox_id: str, session_id: str) -> None:
+        """Forget a prewarmed sandbox that was cleaned up before anyone claimed it"""
+        entry = self._prewarm_tasks.get(session_id)
+        if not entry:
+            return
+        task = entry[1]
+        # In-flight creations that fail are dropped by _on_prewarm_done instead
+        if task.done() and not task.cancelled() and task.exception() is None and task.result() == sandbox_id:
+            del self._prewarm_tasks[session_id]
+    
+    async def _claim_prewarmed(self, session_id: str, template: str) -> Optional[str]:
+        """Return the prewarmed sandbox for the session, waiting if it is still starting"""
+        entry = self._prewarm_tasks.pop(session_id, None)
+        if not entry:
+            return None
+        
+        prewarm_template, task = entry
+        try:
+            sandbox_id = await task
+        except Exception:
+            return None
+        
+        if sandbox_id not in self.sandbox_manager.sandboxes:
+            # Reaped by the inactivity cleanup before anyone used it
+            return None
+        if prewarm_template != template:
+            await self.sandbox_manager.cleanup_sandbox(sandbox_id)
+            return None
+        return sandbox_id
     
     async def create_sandbox(self, session_id: str, template: str = "base") -> str:
         """Create a new sandbox for the session"""
-        config = SandboxConfig(template_id=template)
+        sandbox_id = await self._claim_prewarmed(session_id, template)
+        if sandbox_id:
+            return sandbox_id
+        
+        config = _session_config(template)
         return await self.sandbox_manager.create_sandbox(session_id, config)
     
     async def write_files(self, session_id: str, artifacts: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Write files to the session's sandbox"""
+        entry = self._prewarm_tasks.pop(session_id, None)
+        if entry:
+            # Don't write into a sandbox that is still being created
+            await asyncio.gather(entry[1], return_exceptions=True)
+        
         sandbox_id = self.sandbox_manager.get_sandbox_by_session(session_id)
         if not sandbox_id:
             # Create sandbox if it doesn't exist
@@ -65,6 +137,11 @@ class E2BService:
     
     async def cleanup_session(self, session_id: str) -> bool:
         """Clean up sandbox for the session"""
+        entry = self._prewarm_tasks.pop(session_id, None)
+        if entry:
+            # Let an in-flight prewarm finish so its sandbox is registered and closed below
+            await asyncio.gather(entry[1], return_exceptions=True)
+        
         sandbox_id = self.sandbox_manager.get_sandbox_by_session(session_id)
         if not sandbox_id:
             return False
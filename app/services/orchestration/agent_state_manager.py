@@ -2,6 +2,8 @@
 Agent state management and lifecycle
 """
 
+import time
+from collections import Counter
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
@@ -121,7 +123,7 @@ class AgentStateManager:
         agent.update_activity()
         
         self._notify_state_change(agent, state, old_state)
-        logger.debug(f"Agent {agent_id} state changed from {old_state} to {state}")
+        logger.debug("Agent %s state changed from %s to %s", agent_id, old_state, state)
     
     def update_agent_context(self, agent_id: str, context: Dict) -> None:
         """Update agent context"""
@@ -151,7 +153,7 @@ class AgentStateManager:
             'current_state': agent.state.value,
             'created_at': agent.created_at.isoformat(),
             'last_activity': agent.last_activity.isoformat(),
-            'uptime_seconds': (datetime.now() - agent.created_at).total_seconds()
+            'uptime_seconds': time.monotonic() - agent.created_monotonic
         }
         
         metrics.update(agent.metrics)
@@ -178,6 +180,13 @@ class AgentStateManager:
         
         return inactive_agents
     
+    def remove_agents(self, agent_ids: List[str]) -> None:
+        """Forget agents of a finished session"""
+        for agent_id in agent_ids:
+            agent = self.agents.pop(agent_id, None)
+            if agent and self.role_to_agent.get(agent.role) == agent_id:
+                del self.role_to_agent[agent.role]
+    
     def add_state_change_callback(self, callback: callable) -> None:
         """Add callback for state changes"""
         self.state_change_callbacks.append(callback)
@@ -197,14 +206,12 @@ class AgentStateManager:
     def get_statistics(self) -> Dict:
         """Get agent statistics"""
         total_agents = len(self.agents)
-        state_counts = {}
-        
-        for state in AgentState:
-            state_counts[state.value] = len([a for a in self.agents.values() if a.state == state])
+        counts = Counter(agent.state for agent in self.agents.values())
+        state_counts = {state.value: counts[state] for state in AgentState}
         
         return {
             'total_agents': total_agents,
             'state_distribution': state_counts,
-            'available_agents': len(self.get_available_agents()),
-            'busy_agents': len(self.get_busy_agents())
+            'available_agents': counts[AgentState.IDLE] + counts[AgentState.COMPLETED],
+            'busy_agents': counts[AgentState.EXECUTING] + counts[AgentState.THINKING]
         }
\ No newline at end of file
@@ -20,17 +20,23 @@ class ArtifactProcessor:
     
     def __init__(self):
         self.artifacts_cache: Dict[str, Dict] = {}
+        # Artifact IDs per session, so lookups and release don't scan the whole cache
+        self.session_artifact_ids: Dict[str, List[str]] = {}
         self.workspace_base = Path(settings.METAGPT_WORKSPACE)
     
     def process_artifacts(self, session_id: str, raw_artifacts: List[Dict]) -> List[Dict]:
         """Process raw artifacts into standardized format"""
         processed_artifacts = []
+        created_at = datetime.now().isoformat()
+        session_ids = self.session_artifact_ids.setdefault(session_id, [])
         
         for artifact in raw_artifacts:
             try:
-                processed = self._process_single_artifact(session_id, artifact)
+                processed = self._process_single_artifact(session_id, artifact, created_at)
                 if processed:
                     processed_artifacts.append(processed)
+                    if processed['id'] not in self.artifacts_cache:
+                        session_ids.append(processed['id'])
                     self.artifacts_cache[processed['id']] = processed
             except Exception as e:
                 logger.error(f"Failed to process artifact: {e}")
@@ -38,7 +44,7 @@ class ArtifactProcessor:
         logger.info(f"Processed {len(processed_artifacts)} artifacts for session {session_id}")
         return processed_artifacts
     
-    def _process_single_artifact(self, session_id: str, artifact: Dict) -> Optional[Dict]:
+    def _process_single_artifact(self, session_id: str, artifact: Dict, created_at: str) -> Optional[Dict]:
         """Process a single artifact"""
         # Validate required fields
         required_fields = ['name', 'content', 'type']
@@ -61,7 +67,7 @@ class ArtifactProcessor:
             'agent_role': artifact.get('agent_role', 'unknown'),
             'file_path': artifact.get('file_path', artifact['name']),
             'size': len(artifact['content']),
-            'created_at': artifact.get('created_at', datetime.now().isoformat()),
+            'created_at': artifact.get('created_at', created_at),
             'language': artifact.get('language'),
             'dependencies': artifact.get('dependencies', []),
             'metadata': self._extract_metadata(artifact)
@@ -316,23 +322,32 @@ class ArtifactProcessor:
     
     def get_session_artifacts(self, session_id: str) -> List[Dict]:
         """Get all artifacts for a session"""
-        return [artifact for artifact in self.artifacts_cache.values() 
-                if artifact.get('session_id') == session_id]
+        return [self.artifacts_cache[artifact_id]
+                for artifact_id in self.session_artifact_ids.get(session_id, ())]
+    
+    def release_session(self, session_id: str) -> None:
+        """Drop a session's artifacts from the cache"""
+        for artifact_id in self.session_artifact_ids.pop(session_id, ()):
+            self.artifacts_cache.pop(artifact_id, None)
     
     def save_artifacts_to_disk(self, session_id: str, artifacts: List[Dict]) -> str:
         """Save artifacts to disk and return workspace path"""
         workspace_path = self.workspace_base / session_id
         workspace_path.mkdir(parents=True, exist_ok=True)
+        # Directories already created in this pass (skip repeat mkdir syscalls)
+        created_dirs = {workspace_path}
         
         for artifact in artifacts:
             try:
                 file_path = workspace_path / artifact['name']
-                file_path.parent.mkdir(parents=True, exist_ok=True)
+                if file_path.parent not in created_dirs:
+                    file_path.parent.mkdir(parents=True, exist_ok=True)
+                    created_dirs.add(file_path.parent)
                 
                 with open(file_path, 'w', encoding='utf-8') as f:
                     f.write(artifact['content'])
                 
-                logger.debug(f"Saved artifact {artifact['id']} to {file_path}")
+                logger.debug("Saved artifact %s to %s", artifact['id'], file_path)
                 
             except Exception as e:
                 logger.error(f"Failed to save artifact {artifact['id']}: {e}")
@@ -7,7 +7,7 @@ import os
 import yaml
 import json
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, FrozenSet, List, Optional, Any, Tuple
 from datetime import datetime
 
 from app.core.logging import get_logger
@@ -26,6 +26,81 @@ _PLACEHOLDER_MARKERS = (
     "replace_me",
 )
 
+# Every AgentRole maps onto a MetaGPT role class (DevOps runs as Engineer)
+_SUPPORTED_ROLES: Tuple[AgentRole, ...] = tuple(AgentRole)
+
+# Artifact type per file extension (anything else is 'other')
+_TYPE_MAP: Dict[str, str] = {
+    '.py': 'code',
+    '.js': 'code',
+    '.jsx': 'code',
+    '.ts': 'code',
+    '.tsx': 'code',
+    '.html': 'code',
+    '.css': 'code',
+    '.scss': 'code',
+    '.json': 'configuration',
+    '.yaml': 'configuration',
+    '.yml': 'configuration',
+    '.toml': 'configuration',
+    '.md': 'documentation',
+    '.txt': 'documentation',
+    '.rst': 'documentation',
+    '.dockerfile': 'configuration',
+    '.env': 'configuration'
+}
+
+# Source language per file extension
+_LANGUAGE_MAP: Dict[str, str] = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.jsx': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.html': 'html',
+    '.css': 'css',
+    '.scss': 'scss',
+    '.json': 'json',
+    '.yaml': 'yaml',
+    '.yml': 'yaml',
+    '.toml': 'toml',
+    '.md': 'markdown',
+    '.sql': 'sql',
+    '.sh': 'bash',
+    '.dockerfile': 'dockerfile'
+}
+
+# Suffixes that are never UTF-8 text; skipped without attempting a read
+_BINARY_SUFFIXES = frozenset((
+    '.pyc', '.pyo', '.so', '.dll', '.dylib', '.exe', '.o', '.a', '.class', '.jar',
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp',
+    '.pdf', '.zip', '.gz', '.tar', '.tgz', '.bz2', '.xz', '.7z', '.whl',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot',
+    '.mp3', '.mp4', '.wav', '.mov', '.db', '.sqlite', '.pkl', '.npy',
+))
+
+# Prompt wrapper handed to the MetaGPT team; filled per request by _enhance_requirement
+_REQUIREMENT_TEMPLATE = """
+Project Requirement:
+{requirement}
+
+Application Type: {app_type}
+Target Technology Stack: {tech_stack}
+AI Model: {model} (AWS Bedrock)
+Priority: {priority}
+
+Additional Context:
+{additional}
+
+Please generate a complete, production-ready application with:
+1. Clean, well-documented code
+2. Proper error handling
+3. Security best practices
+4. Scalable architecture
+5. Comprehensive testing
+6. Deployment configuration
+"""
+
 
 def _effective_llm_api_key(raw: str) -> str:
     """Return stripped key if non-empty and not a template placeholder."""
@@ -42,18 +117,69 @@ def _effective_llm_api_key(raw: str) -> str:
     return key
 
 
+# (config_dir, api_type, model, api_key) last written by _apply_metagpt_environment
+_applied_environment: Optional[Tuple[str, str, str, str]] = None
+
+
+def _apply_metagpt_environment(config_dir: str, api_type: str, model: str, api_key: str) -> None:
+    """Write config2.yaml and export MetaGPT env vars unless already applied"""
+    global _applied_environment
+    applied = (config_dir, api_type, model, api_key)
+    if applied == _applied_environment:
+        return
+    metagpt_config = {
+        "llm": {
+            "api_type": api_type,
+            "model": model,
+            "api_key": api_key,
+            "max_tokens": 4000,
+            "temperature": 0.7
+        }
+    }
+    
+    config_file = Path(config_dir) / "config2.yaml"
+    with open(config_file, 'w') as f:
+        yaml.dump(metagpt_config, f, default_flow_style=False)
+    
+    # Set environment variables for MetaGPT
+    os.environ["METAGPT_CONFIG_PATH"] = str(config_file)
+    os.environ["METAGPT_WORKSPACE"] = settings.METAGPT_WORKSPACE
+    if api_type == "openai" and api_key != "dummy-key-for-development":
+        os.environ['OPENAI_API_KEY'] = api_key
+    elif api_type == "anthropic":
+        os.environ['ANTHROPIC_API_KEY'] = api_key
+    _applied_environment = applied
+
+
 class MetaGPTExecutor:
     """Handles MetaGPT execution and configuration"""
     
+    # Resolved MetaGPT role classes keyed by the requested AgentRole set
+    # (at most 2**len(AgentRole) entries). Role *instances* are not shared:
+    # they carry per-run memory.
+    _team_classes_cache: Dict[FrozenSet[AgentRole], List[type]] = {}
+    # AgentRole -> MetaGPT role class, built on first generation
+    _role_classes: Optional[Dict[AgentRole, type]] = None
+    
     def __init__(self):
         self.metagpt_configured = False
         self._setup_error: Optional[str] = None
+        # Caps simultaneous MetaGPT team runs so LLM calls don't stampede rate limits
+        self._run_semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_GENERATIONS)
         try:
             self._setup_metagpt()
         except MetaGPTException as e:
             # Defer the error to request time so the server can still start
             self._setup_error = str(e)
             logger.warning(f"MetaGPT not configured at startup: {e}")
+            return
+        
+        # Import the role classes now (after config/env are in place) so the
+        # heavy MetaGPT import graph is not paid on the first generation
+        try:
+            self._get_role_classes()
+        except MetaGPTException as e:
+            logger.warning(f"MetaGPT roles unavailable: {e}")
     
     def _setup_metagpt(self) -> None:
         """Initialize MetaGPT with proper configuration"""
@@ -91,28 +217,8 @@ class MetaGPTExecutor:
                     "Set one of these in .env and restart the server."
                 )
             
-            # Create MetaGPT configuration
-            metagpt_config = {
-                "llm": {
-                    "api_type": api_type,
-                    "model": model,
-                    "api_key": api_key,
-                    "max_tokens": 4000,
-                    "temperature": 0.7
-                }
-            }
-            
-            config_file = config_dir / "config2.yaml"
-            with open(config_file, 'w') as f:
-                yaml.dump(metagpt_config, f, default_flow_style=False)
-            
-            # Set environment variables for MetaGPT
-            os.environ["METAGPT_CONFIG_PATH"] = str(config_dir / "config2.yaml")
-            os.environ["METAGPT_WORKSPACE"] = settings.METAGPT_WORKSPACE
-            if api_type == "openai" and api_key != "dummy-key-for-development":
-                os.environ['OPENAI_API_KEY'] = api_key
-            elif api_type == "anthropic":
-                os.environ['ANTHROPIC_API_KEY'] = api_key
+            # Write MetaGPT configuration and environment (no-op if unchanged)
+            _apply_metagpt_environment(str(config_dir), api_type, model, api_key)
             
             # Create workspace directory
             workspace_path = Path(settings.METAGPT_WORKSPACE)
@@ -127,6 +233,39 @@ class MetaGPTExecutor:
             logger.error(f"Failed to setup MetaGPT: {e}")
             raise MetaGPTException(f"MetaGPT setup failed: {e}")
 
+    @classmethod
+    def clear_role_cache(cls) -> None:
+        """Drop cached MetaGPT role class resolutions"""
+        cls._team_classes_cache.clear()
+        cls._role_classes = None
+
+    @classmethod
+    def _get_role_classes(cls) -> Dict[AgentRole, type]:
+        """Resolve the AgentRole -> MetaGPT role class table once"""
+        if cls._role_classes is None:
+            try:
+                from metagpt.roles import (
+                    ProductManager,
+                    Architect,
+                    ProjectManager,
+                    Engineer,
+                    QaEngineer,
+                )
+            except ImportError as e:
+                raise MetaGPTException(
+                    f"MetaGPT package not installed. Run: pip install -e \".[metagpt]\" or pip install metagpt==0.8.1. Error: {e}"
+                )
+            # DevOps maps to Engineer; MetaGPT has no DevOps role
+            cls._role_classes = {
+                AgentRole.PRODUCT_MANAGER: ProductManager,
+                AgentRole.ARCHITECT: Architect,
+                AgentRole.PROJECT_MANAGER: ProjectManager,
+                AgentRole.ENGINEER: Engineer,
+                AgentRole.QA_ENGINEER: QaEngineer,
+                AgentRole.DEVOPS: Engineer,
+            }
+        return cls._role_classes
+
     def _run_metagpt_team_blocking(
         self,
         request: GenerationRequest,
@@ -198,43 +337,28 @@ class MetaGPTExecutor:
             # Log the selected model (MetaGPT uses OpenAI/Anthropic; Bedrock model is informational)
             logger.debug(f"Generation requested with Bedrock model: {request.preferred_model.value}")
             
-            # Import MetaGPT (lazy import to avoid startup issues)
-            try:
-                from metagpt.roles import (
-                    ProductManager,
-                    Architect,
-                    ProjectManager,
-                    Engineer,
-                    QaEngineer,
-                )
-            except ImportError as e:
-                raise MetaGPTException(
-                    f"MetaGPT package not installed. Run: pip install -e \".[metagpt]\" or pip install metagpt==0.8.1. Error: {e}"
-                )
+            # Preloaded at startup; retried here if the import failed then
+            role_classes = self._get_role_classes()
             
             if progress_callback:
                 await progress_callback(10, "Initializing MetaGPT team...")
             
-            # Map agent roles to MetaGPT roles (DevOps maps to Engineer; MetaGPT has no DevOps role)
-            role_mapping = {
-                AgentRole.PRODUCT_MANAGER: ProductManager,
-                AgentRole.ARCHITECT: Architect,
-                AgentRole.PROJECT_MANAGER: ProjectManager,
-                AgentRole.ENGINEER: Engineer,
-                AgentRole.QA_ENGINEER: QaEngineer,
-                AgentRole.DEVOPS: Engineer,
-            }
-            # One hire per MetaGPT role class to avoid duplicate agents when e.g. Engineer + DevOps
-            team_role_classes: List[type] = []
-            seen_metagpt_classes = set()
-            for role in request.active_agents:
-                if role not in role_mapping:
-                    continue
-                cls = role_mapping[role]
-                if cls in seen_metagpt_classes:
-                    continue
-                seen_metagpt_classes.add(cls)
-                team_role_classes.append(cls)
+            cache_key = frozenset(request.active_agents)
+            team_role_classes = self._team_classes_cache.get(cache_key)
+            if team_role_classes is None:
+                # One hire per MetaGPT role class to avoid duplicate agents when e.g. Engineer + DevOps;
+                # hire in AgentRole declaration order so the result depends only on the set
+                team_role_classes = []
+                seen_metagpt_classes = set()
+                for role in AgentRole:
+                    if role not in cache_key:
+                        continue
+                    cls = role_classes.get(role)
+                    if cls is None or cls in seen_metagpt_classes:
+                        continue
+                    seen_metagpt_classes.add(cls)
+                    team_role_classes.append(cls)
+                self._team_classes_cache[cache_key] = team_role_classes
 
             if not team_role_classes:
                 raise MetaGPTException(
@@ -250,7 +374,8 @@ class MetaGPTExecutor:
             def _blocking():
                 return self._run_metagpt_team_blocking(request, session_id, team_role_classes)
 
-            project_repo = await loop.run_in_executor(None, _blocking)
+            async with self._run_semaphore:
+                project_repo = await loop.run_in_executor(None, _blocking)
             
             if progress_callback:
                 await progress_callback(90, "Processing MetaGPT results...")
@@ -270,27 +395,14 @@ class MetaGPTExecutor:
     
     def _enhance_requirement(self, request: GenerationRequest) -> str:
         """Enhance the requirement with additional context"""
-        enhanced = f"""
-Project Requirement:
-{request.requirement}
-
-Application Type: {request.app_type.value}
-Target Technology Stack: {', '.join(request.tech_stack_preferences) if request.tech_stack_preferences else 'Modern web technologies'}
-AI Model: {request.preferred_model.value} (AWS Bedrock)
-Priority: {request.priority.value}
-
-Additional Context:
-{request.additional_requirements or 'None specified'}
-
-Please generate a complete, production-ready application with:
-1. Clean, well-documented code
-2. Proper error handling
-3. Security best practices
-4. Scalable architecture
-5. Comprehensive testing
-6. Deployment configuration
-"""
-        return enhanced
+        return _REQUIREMENT_TEMPLATE.format(
+            requirement=request.requirement,
+            app_type=request.app_type.value,
+            tech_stack=', '.join(request.tech_stack_preferences) if request.tech_stack_preferences else 'Modern web technologies',
+            model=request.preferred_model.value,
+            priority=request.priority.value,
+            additional=request.additional_requirements or 'None specified',
+        )
     
     def _workspace_roots_for_session(
         self, session_id: str, project_repo: Optional[Any] = None
@@ -313,16 +425,25 @@ Please generate a complete, production-ready application with:
     async def _process_metagpt_results(
         self, session_id: str, project_repo: Optional[Any] = None
     ) -> List[Dict[str, Any]]:
-        """Collect generated files from MetaGPT workspace(s)."""
+        """Collect generated files from MetaGPT workspace(s) off the event loop."""
+        return await asyncio.to_thread(self._collect_workspace_files, session_id, project_repo)
+
+    def _collect_workspace_files(
+        self, session_id: str, project_repo: Optional[Any] = None
+    ) -> List[Dict[str, Any]]:
+        """Walk the workspace(s) and read generated files (blocking file I/O)."""
         artifacts: List[Dict[str, Any]] = []
         seen_paths: set = set()
+        created_at = datetime.now().isoformat()
 
         try:
             for workspace_path in self._workspace_roots_for_session(session_id, project_repo):
                 if not workspace_path.exists():
                     continue
                 for file_path in workspace_path.rglob("*"):
-                    if not file_path.is_file() or file_path.name.startswith('.'):
+                    if file_path.name.startswith('.') or file_path.suffix.lower() in _BINARY_SUFFIXES:
+                        continue
+                    if not file_path.is_file():
                         continue
                     try:
                         resolved = file_path.resolve()
@@ -350,7 +471,7 @@ Please generate a complete, production-ready application with:
                         'agent_role': 'metagpt',
                         'file_path': rel,
                         'size': len(content),
-                        'created_at': datetime.now().isoformat(),
+                        'created_at': created_at,
                         'language': self._detect_language(file_path),
                     }
                     artifacts.append(artifact)
@@ -364,65 +485,15 @@ Please generate a complete, production-ready application with:
     
     def _determine_file_type(self, file_path: Path) -> str:
         """Determine file type based on extension"""
-        extension = file_path.suffix.lower()
-        
-        type_mapping = {
-            '.py': 'code',
-            '.js': 'code',
-            '.jsx': 'code',
-            '.ts': 'code',
-            '.tsx': 'code',
-            '.html': 'code',
-            '.css': 'code',
-            '.scss': 'code',
-            '.json': 'configuration',
-            '.yaml': 'configuration',
-            '.yml': 'configuration',
-            '.toml': 'configuration',
-            '.md': 'documentation',
-            '.txt': 'documentation',
-            '.rst': 'documentation',
-            '.dockerfile': 'configuration',
-            '.env': 'configuration'
-        }
-        
-        return type_mapping.get(extension, 'other')
+        return _TYPE_MAP.get(file_path.suffix.lower(), 'other')
     
     def _detect_language(self, file_path: Path) -> Optional[str]:
         """Detect programming language from file extension"""
-        extension = file_path.suffix.lower()
-        
-        language_mapping = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.jsx': 'javascript',
-            '.ts': 'typescript',
-            '.tsx': 'typescript',
-            '.html': 'html',
-            '.css': 'css',
-            '.scss': 'scss',
-            '.json': 'json',
-            '.yaml': 'yaml',
-            '.yml': 'yaml',
-            '.toml': 'toml',
-            '.md': 'markdown',
-            '.sql': 'sql',
-            '.sh': 'bash',
-            '.dockerfile': 'dockerfile'
-        }
-        
-        return language_mapping.get(extension)
+        return _LANGUAGE_MAP.get(file_path.suffix.lower())
     
     def get_supported_roles(self) -> List[AgentRole]:
         """Get list of supported agent roles"""
-        return [
-            AgentRole.PRODUCT_MANAGER,
-            AgentRole.ARCHITECT,
-            AgentRole.PROJECT_MANAGER,
-            AgentRole.ENGINEER,
-            AgentRole.QA_ENGINEER,
-            AgentRole.DEVOPS,
-        ]
+        return list(_SUPPORTED_ROLES)
     
     def validate_request(self, request: GenerationRequest) -> List[str]:
         """Validate generation request"""
@@ -436,9 +507,8 @@ Please generate a complete, production-ready application with:
             )
         
         # Validate agent roles
-        supported_roles = self.get_supported_roles()
         for role in request.active_agents:
-            if role not in supported_roles:
+            if role not in _SUPPORTED_ROLES:
                 errors.append(f"Unsupported agent role: {role}")
         
         # Validate requirement length
@@ -2,11 +2,12 @@
 Data models for orchestration system
 """
 
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Awaitable, Callable, Dict, List, Optional, Any
 
 from app.models.schemas import AgentRole
 
@@ -54,15 +55,23 @@ class AgentTask:
     created_at: datetime = field(default_factory=datetime.now)
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    # Monotonic start time for elapsed-time metrics (started_at is for display)
+    started_monotonic: Optional[float] = None
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     retry_count: int = 0
     max_retries: int = 3
+    # Unfinished dependencies; maintained by TaskScheduler
+    pending_dependencies: int = 0
     
     def can_execute(self, completed_tasks: List[str]) -> bool:
         """Check if task can be executed based on dependencies"""
         return all(dep in completed_tasks for dep in self.dependencies)
     
+    def dependencies_met(self) -> bool:
+        """Check if every dependency has completed"""
+        return self.pending_dependencies == 0
+    
     def is_ready(self) -> bool:
         """Check if task is ready to be executed"""
         return self.status == TaskStatus.PENDING
@@ -98,6 +107,7 @@ class AgentInstance:
     workspace_path: Optional[Path] = None
     context: Dict[str, Any] = field(default_factory=dict)
     metrics: Dict[str, Any] = field(default_factory=dict)
+    created_monotonic: float = field(default_factory=time.monotonic)
     
     def is_available(self) -> bool:
         """Check if agent is available for new tasks"""
@@ -126,6 +136,8 @@ class OrchestrationSession:
     artifacts: List[Dict[str, Any]] = field(default_factory=list)
     client_id: Optional[str] = None
     workspace_path: Optional[Path] = None
+    # SSE push bound to this session's stream, set once at creation
+    push: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = field(default=None, repr=False)
     
     def get_agent_by_role(self, role: AgentRole) -> Optional[AgentInstance]:
         """Get agent instance by role"""
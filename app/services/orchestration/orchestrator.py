@@ -3,8 +3,11 @@ Main agent orchestrator that coordinates all components
 """
 
 import asyncio
+import heapq
 import uuid
-from typing import Dict, List, Optional, Any
+from functools import partial
+from types import MappingProxyType
+from typing import Coroutine, Dict, List, Mapping, Optional, Any, Set, Tuple
 from datetime import datetime
 from pathlib import Path
 
@@ -13,6 +16,8 @@ from app.core.exceptions import OrchestrationException, SessionException
 from app.models.schemas import GenerationRequest, AgentRole
 from .models import OrchestrationSession, AgentTask, TaskPriority, AgentState
 from app.core.config import settings
+from app.services import get_e2b_service
+from app.services.sse_manager import _push, _push_artifacts, _push_progress
 from .task_scheduler import TaskScheduler
 from .agent_state_manager import AgentStateManager
 from .metagpt_executor import MetaGPTExecutor
@@ -20,12 +25,60 @@ from .artifact_processor import ArtifactProcessor
 
 logger = get_logger(__name__)
 
+# Task template per role: (id suffix, task type, description, priority)
+_ROLE_TASKS: Mapping[AgentRole, Tuple[str, str, str, TaskPriority]] = MappingProxyType({
+    AgentRole.PRODUCT_MANAGER: (
+        "pm_analysis", "requirement_analysis",
+        "Analyze requirements and create product specification", TaskPriority.HIGH,
+    ),
+    AgentRole.ARCHITECT: (
+        "arch_design", "system_design",
+        "Create system architecture and design", TaskPriority.HIGH,
+    ),
+    AgentRole.PROJECT_MANAGER: (
+        "proj_plan", "project_planning",
+        "Create project plan and task breakdown", TaskPriority.NORMAL,
+    ),
+    AgentRole.ENGINEER: (
+        "implementation", "implementation",
+        "Implement the application code", TaskPriority.CRITICAL,
+    ),
+    AgentRole.QA_ENGINEER: (
+        "testing", "testing",
+        "Create and run tests", TaskPriority.HIGH,
+    ),
+})
+
+# Upstream roles whose tasks must finish first (when selected in the request)
+_ROLE_DEPENDENCIES: Mapping[AgentRole, Tuple[AgentRole, ...]] = MappingProxyType({
+    AgentRole.ARCHITECT: (AgentRole.PRODUCT_MANAGER,),
+    AgentRole.PROJECT_MANAGER: (AgentRole.ARCHITECT,),
+    AgentRole.ENGINEER: (AgentRole.ARCHITECT, AgentRole.PROJECT_MANAGER),
+    AgentRole.QA_ENGINEER: (AgentRole.ENGINEER,),
+})
+
+# Finished sessions are kept this long after creation before being cleaned up
+_SESSION_RETENTION_SECONDS = 24 * 3600
+
+# Order in which tasks are created (and registered with the scheduler)
+_TASK_ROLE_ORDER: Tuple[AgentRole, ...] = (
+    AgentRole.PRODUCT_MANAGER,
+    AgentRole.ARCHITECT,
+    AgentRole.PROJECT_MANAGER,
+    AgentRole.ENGINEER,
+    AgentRole.QA_ENGINEER,
+)
+
 
 class AgentOrchestrator:
     """Main orchestrator for agent-based application generation"""
     
     def __init__(self):
         self.sessions: Dict[str, OrchestrationSession] = {}
+        # Owning session per agent, so state callbacks touch only that session
+        self._agent_sessions: Dict[str, str] = {}
+        # (expires_at timestamp, session_id) for finished sessions, earliest first
+        self._expiry_heap: List[Tuple[float, str]] = []
         self.task_scheduler = TaskScheduler()
         self.agent_manager = AgentStateManager()
         self.metagpt_executor = MetaGPTExecutor()
@@ -37,6 +90,21 @@ class AgentOrchestrator:
         # Background tasks (will be started when needed)
         self._cleanup_task = None
         self._background_tasks_started = False
+        # Strong references to running session tasks so they are not GC'd mid-run
+        self._session_tasks: Set[asyncio.Task] = set()
+    
+    def _spawn(self, coro: Coroutine) -> asyncio.Task:
+        """Start a tracked background task and log any unhandled failure"""
+        task = asyncio.create_task(coro)
+        self._session_tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+    
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        """Release a finished background task"""
+        self._session_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background task {task.get_name()} failed: {task.exception()}")
     
     def _start_background_tasks(self):
         """Start background maintenance tasks"""
@@ -74,7 +142,8 @@ class AgentOrchestrator:
                 id=session_id,
                 status="initializing",
                 client_id=client_id,
-                workspace_path=Path(settings.METAGPT_WORKSPACE) / session_id
+                workspace_path=Path(settings.METAGPT_WORKSPACE) / session_id,
+                push=partial(_push, session_id)
             )
             
             # Create agents for selected roles
@@ -86,6 +155,7 @@ class AgentOrchestrator:
                     workspace_path=str(session.workspace_path)
                 )
                 session.agents.append(agent)
+                self._agent_sessions[agent_id] = session_id
             
             # Create tasks
             tasks = self._create_tasks_for_request(request, session_id)
@@ -103,7 +173,7 @@ class AgentOrchestrator:
             self.sessions[session_id] = session
             
             # Start execution
-            asyncio.create_task(self._execute_session(session_id, request))
+            self._spawn(self._execute_session(session_id, request))
             
             logger.info(f"Created session {session_id} with {len(session.agents)} agents and {len(tasks)} tasks")
             return session_id
@@ -113,79 +183,39 @@ class AgentOrchestrator:
             # Cleanup on failure
             if session_id in self.sessions:
                 del self.sessions[session_id]
+            for role in request.active_agents:
+                self._agent_sessions.pop(f"{session_id}_{role.value}", None)
             raise OrchestrationException(f"Session creation failed: {e}")
     
     def _create_tasks_for_request(self, request: GenerationRequest, session_id: str) -> List[AgentTask]:
         """Create tasks based on generation request"""
         tasks = []
+        active_roles = set(request.active_agents)
+        # IDs of tasks created so far; _TASK_ROLE_ORDER puts upstream roles first
+        task_ids_by_role: Dict[AgentRole, str] = {}
         
         # Task creation based on selected agents
-        if AgentRole.PRODUCT_MANAGER in request.active_agents:
-            tasks.append(AgentTask(
-                id=f"{session_id}_pm_analysis",
-                agent_role=AgentRole.PRODUCT_MANAGER,
-                task_type="requirement_analysis",
-                description="Analyze requirements and create product specification",
-                priority=TaskPriority.HIGH
-            ))
-        
-        if AgentRole.ARCHITECT in request.active_agents:
-            architect_deps = []
-            if AgentRole.PRODUCT_MANAGER in request.active_agents:
-                architect_deps.append(f"{session_id}_pm_analysis")
+        for role in _TASK_ROLE_ORDER:
+            if role not in active_roles:
+                continue
             
-            tasks.append(AgentTask(
-                id=f"{session_id}_arch_design",
-                agent_role=AgentRole.ARCHITECT,
-                task_type="system_design",
-                description="Create system architecture and design",
-                priority=TaskPriority.HIGH,
-                dependencies=architect_deps
-            ))
-        
-        if AgentRole.PROJECT_MANAGER in request.active_agents:
-            pm_deps = []
-            if AgentRole.ARCHITECT in request.active_agents:
-                pm_deps.append(f"{session_id}_arch_design")
-            
-            tasks.append(AgentTask(
-                id=f"{session_id}_proj_plan",
-                agent_role=AgentRole.PROJECT_MANAGER,
-                task_type="project_planning",
-                description="Create project plan and task breakdown",
-                priority=TaskPriority.NORMAL,
-                dependencies=pm_deps
-            ))
-        
-        if AgentRole.ENGINEER in request.active_agents:
-            eng_deps = []
-            if AgentRole.ARCHITECT in request.active_agents:
-                eng_deps.append(f"{session_id}_arch_design")
-            if AgentRole.PROJECT_MANAGER in request.active_agents:
-                eng_deps.append(f"{session_id}_proj_plan")
+            suffix, task_type, description, priority = _ROLE_TASKS[role]
+            dependencies = [
+                task_ids_by_role[dep_role]
+                for dep_role in _ROLE_DEPENDENCIES.get(role, ())
+                if dep_role in task_ids_by_role
+            ]
             
-            tasks.append(AgentTask(
-                id=f"{session_id}_implementation",
-                agent_role=AgentRole.ENGINEER,
-                task_type="implementation",
-                description="Implement the application code",
-                priority=TaskPriority.CRITICAL,
-                dependencies=eng_deps
-            ))
-        
-        if AgentRole.QA_ENGINEER in request.active_agents:
-            qa_deps = []
-            if AgentRole.ENGINEER in request.active_agents:
-                qa_deps.append(f"{session_id}_implementation")
-            
-            tasks.append(AgentTask(
-                id=f"{session_id}_testing",
-                agent_role=AgentRole.QA_ENGINEER,
-                task_type="testing",
-                description="Create and run tests",
-                priority=TaskPriority.HIGH,
-                dependencies=qa_deps
-            ))
+            task = AgentTask(
+                id=f"{session_id}_{suffix}",
+                agent_role=role,
+                task_type=task_type,
+                description=description,
+                priority=priority,
+                dependencies=dependencies
+            )
+            tasks.append(task)
+            task_ids_by_role[role] = task.id
         
         return tasks
     
@@ -200,8 +230,8 @@ class AgentOrchestrator:
             session.update_progress(5, "Starting generation process...")
             
             # Push initial SSE progress
-            from app.services.sse_manager import _push
-            await _push(session_id, {
+            push = session.push
+            await push({
                 "type": "progress_update",
                 "generation_id": session_id,
                 "status": "running",
@@ -209,13 +239,15 @@ class AgentOrchestrator:
                 "message": "Starting generation process...",
             })
 
+            # Code is coming: start the preview sandbox now so it is warm when artifacts land
+            if any(task.agent_role == AgentRole.ENGINEER for task in session.tasks):
+                get_e2b_service().prewarm_sandbox(session_id)
+
             # Execute MetaGPT generation
             result = await self.metagpt_executor.execute_generation(
                 request=request,
                 session_id=session_id,
-                progress_callback=lambda p, m: asyncio.create_task(
-                    self._update_session_progress(session_id, p, m)
-                )
+                progress_callback=partial(self._update_session_progress, session_id)
             )
             
             # Process artifacts
@@ -226,29 +258,30 @@ class AgentOrchestrator:
                 )
                 session.artifacts = processed_artifacts
                 
-                # Save to disk
-                workspace_path = self.artifact_processor.save_artifacts_to_disk(
+                # Save to disk (blocking file I/O, keep it off the event loop)
+                workspace_path = await asyncio.to_thread(
+                    self.artifact_processor.save_artifacts_to_disk,
                     session_id=session_id,
                     artifacts=processed_artifacts
                 )
                 session.workspace_path = Path(workspace_path)
 
-                # Push artifact updates via SSE
-                for artifact in processed_artifacts:
-                    await _push(session_id, {"type": "artifact_update", "artifact": artifact})
+                # Push artifact updates via SSE as size-capped batches
+                await _push_artifacts(session_id, processed_artifacts)
             
             # Mark session as completed
             session.status = "completed"
             session.update_progress(100, "Generation completed successfully")
+            self._schedule_expiry(session)
 
-            await _push(session_id, {
+            await push({
                 "type": "progress_update",
                 "generation_id": session_id,
                 "status": "completed",
                 "progress": 100,
                 "message": "Generation completed successfully",
             })
-            await _push(session_id, {"type": "stream_end"})
+            await push({"type": "stream_end"})
             
             # Update agent states
             for agent in session.agents:
@@ -260,15 +293,15 @@ class AgentOrchestrator:
             logger.error(f"Session {session_id} execution failed: {e}")
             session.status = "failed"
             session.update_progress(0, f"Generation failed: {str(e)}")
+            self._schedule_expiry(session)
 
             try:
-                from app.services.sse_manager import _push
-                await _push(session_id, {
+                await session.push({
                     "type": "error",
                     "generation_id": session_id,
                     "message": str(e),
                 })
-                await _push(session_id, {"type": "stream_end"})
+                await session.push({"type": "stream_end"})
             except Exception:
                 pass
             
@@ -281,10 +314,10 @@ class AgentOrchestrator:
         session = self.sessions.get(session_id)
         if session:
             session.update_progress(progress, message)
-            logger.debug(f"Session {session_id} progress: {progress}% - {message}")
+            logger.debug("Session %s progress: %s%% - %s", session_id, progress, message)
             try:
-                from app.services.sse_manager import _push
-                await _push(session_id, {
+                # Coalesced: bursts of updates reach the client as the latest one
+                _push_progress(session_id, {
                     "type": "progress_update",
                     "generation_id": session_id,
                     "status": session.status,
@@ -296,20 +329,20 @@ class AgentOrchestrator:
     
     def _on_agent_state_change(self, agent, new_state, old_state=None):
         """Handle agent state changes"""
-        logger.debug(f"Agent {agent.id} state changed from {old_state} to {new_state}")
+        logger.debug("Agent %s state changed from %s to %s", agent.id, old_state, new_state)
         
-        # Update session status based on agent states
-        for session in self.sessions.values():
-            session_agent = session.get_agent_by_role(agent.role)
-            if session_agent and session_agent.id == agent.id:
-                # Update session based on agent state
-                if new_state == AgentState.FAILED:
-                    session.status = "failed"
-                elif new_state == AgentState.COMPLETED:
-                    # Check if all agents are completed
-                    all_completed = all(a.state == AgentState.COMPLETED for a in session.agents)
-                    if all_completed:
-                        session.status = "completed"
+        # Update the owning session based on agent states
+        session = self.sessions.get(self._agent_sessions.get(agent.id, ""))
+        if not session:
+            return
+        
+        if new_state == AgentState.FAILED:
+            session.status = "failed"
+        elif new_state == AgentState.COMPLETED:
+            # Check if all agents are completed
+            all_completed = all(a.state == AgentState.COMPLETED for a in session.agents)
+            if all_completed:
+                session.status = "completed"
     
     def get_session(self, session_id: str) -> Optional[OrchestrationSession]:
         """Get session by ID"""
@@ -361,6 +394,7 @@ class AgentOrchestrator:
         
         session.status = "cancelled"
         session.update_progress(0, "Session cancelled by user")
+        self._schedule_expiry(session)
         
         # Update agent states
         for agent in session.agents:
@@ -380,18 +414,31 @@ class AgentOrchestrator:
             except Exception as e:
                 logger.error(f"Cleanup loop error: {e}")
     
+    def _schedule_expiry(self, session: OrchestrationSession) -> None:
+        """Queue a finished session for removal once its retention period ends"""
+        expires_at = session.created_at.timestamp() + _SESSION_RETENTION_SECONDS
+        heapq.heappush(self._expiry_heap, (expires_at, session.id))
+    
     async def _cleanup_old_sessions(self):
         """Clean up old completed sessions"""
-        cutoff_time = datetime.now().timestamp() - (24 * 3600)  # 24 hours ago
+        now = datetime.now().timestamp()
         
-        sessions_to_remove = []
-        for session_id, session in self.sessions.items():
-            if (session.status in ["completed", "failed", "cancelled"] and
-                session.created_at.timestamp() < cutoff_time):
-                sessions_to_remove.append(session_id)
+        # Pop only expired entries instead of scanning every session
+        sessions_to_remove: Set[str] = set()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, session_id = heapq.heappop(self._expiry_heap)
+            session = self.sessions.get(session_id)
+            if session and session.status in ["completed", "failed", "cancelled"]:
+                sessions_to_remove.add(session_id)  # may be queued twice (e.g. cancel, then fail)
         
         for session_id in sessions_to_remove:
-            del self.sessions[session_id]
+            session = self.sessions.pop(session_id)
+            self.task_scheduler.remove_tasks([task.id for task in session.tasks])
+            self.artifact_processor.release_session(session_id)
+            agent_ids = [agent.id for agent in session.agents]
+            self.agent_manager.remove_agents(agent_ids)
+            for agent_id in agent_ids:
+                self._agent_sessions.pop(agent_id, None)
             logger.info(f"Cleaned up old session {session_id}")
     
     def get_statistics(self) -> Dict:
@@ -2,7 +2,12 @@
 Task scheduling and dependency management
 """
 
-from typing import Dict, List, Optional, Set
+import heapq
+import time
+from collections import Counter
+from itertools import count
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set
 from datetime import datetime
 
 from app.core.logging import get_logger
@@ -11,6 +16,14 @@ from .models import AgentTask, TaskStatus, TaskPriority, AgentInstance
 
 logger = get_logger(__name__)
 
+# Numeric sort weight per priority (higher runs first)
+_PRIORITY_VALUES: Mapping[TaskPriority, int] = MappingProxyType({
+    TaskPriority.LOW: 1,
+    TaskPriority.NORMAL: 2,
+    TaskPriority.HIGH: 3,
+    TaskPriority.CRITICAL: 4
+})
+
 
 class TaskScheduler:
     """Manages task scheduling and dependency resolution"""
@@ -19,6 +32,8 @@ class TaskScheduler:
         self.task_registry: Dict[str, AgentTask] = {}
         self.dependency_graph: Dict[str, Set[str]] = {}
         self.reverse_dependencies: Dict[str, Set[str]] = {}
+        # Pending tasks whose dependencies are all completed
+        self.ready_tasks: Set[str] = set()
     
     def add_task(self, task: AgentTask) -> None:
         """Add a task to the scheduler"""
@@ -29,44 +44,76 @@ class TaskScheduler:
         self.dependency_graph[task.id] = set(task.dependencies)
         
         # Build reverse dependency graph
-        for dep in task.dependencies:
+        pending = 0
+        for dep in self.dependency_graph[task.id]:
             if dep not in self.reverse_dependencies:
                 self.reverse_dependencies[dep] = set()
             self.reverse_dependencies[dep].add(task.id)
+            dep_task = self.task_registry.get(dep)
+            if not dep_task or dep_task.status != TaskStatus.COMPLETED:
+                pending += 1
+        
+        task.pending_dependencies = pending
+        if task.dependencies_met() and task.status == TaskStatus.PENDING:
+            self.ready_tasks.add(task.id)
         
         logger.info(f"Added task {task.id} with dependencies: {task.dependencies}")
     
-    def get_ready_tasks(self, completed_tasks: Set[str]) -> List[AgentTask]:
+    def get_ready_tasks(self) -> List[AgentTask]:
         """Get tasks that are ready to execute"""
-        ready_tasks = []
-        
-        for task_id, task in self.task_registry.items():
-            if (task.status == TaskStatus.PENDING and 
-                self.dependency_graph[task_id].issubset(completed_tasks)):
-                ready_tasks.append(task)
+        ready_tasks = [
+            self.task_registry[task_id] for task_id in self.ready_tasks
+            if self.task_registry[task_id].status == TaskStatus.PENDING
+        ]
         
         # Sort by priority
         ready_tasks.sort(key=lambda t: self._priority_value(t.priority), reverse=True)
         return ready_tasks
     
+    def mark_task_started(self, task_id: str) -> None:
+        """Mark a ready task as running so it is not handed out again"""
+        if task_id not in self.task_registry:
+            raise TaskException(f"Task {task_id} not found")
+        
+        task = self.task_registry[task_id]
+        if task_id not in self.ready_tasks or task.status != TaskStatus.PENDING:
+            raise TaskException(f"Task {task_id} is not ready to start")
+        
+        task.status = TaskStatus.RUNNING
+        task.started_at = datetime.now()
+        task.started_monotonic = time.monotonic()
+        self.ready_tasks.discard(task_id)
+        
+        logger.info(f"Started task {task_id}")
+    
     def mark_task_completed(self, task_id: str) -> List[str]:
         """Mark task as completed and return newly available tasks"""
         if task_id not in self.task_registry:
             raise TaskException(f"Task {task_id} not found")
         
         task = self.task_registry[task_id]
+        if task.status == TaskStatus.COMPLETED:
+            return []
         task.status = TaskStatus.COMPLETED
         task.completed_at = datetime.now()
+        self.ready_tasks.discard(task_id)
         
-        # Find tasks that might now be ready
+        # Release dependents whose last unfinished dependency was this task
         newly_available = []
-        if task_id in self.reverse_dependencies:
-            for dependent_task_id in self.reverse_dependencies[task_id]:
-                dependent_task = self.task_registry[dependent_task_id]
-                if dependent_task.status == TaskStatus.PENDING:
-                    newly_available.append(dependent_task_id)
+        for dependent_task_id in self.reverse_dependencies.get(task_id, ()):
+            dependent_task = self.task_registry.get(dependent_task_id)
+            if not dependent_task:
+                continue
+            dependent_task.pending_dependencies -= 1
+            if dependent_task.dependencies_met() and dependent_task.status == TaskStatus.PENDING:
+                self.ready_tasks.add(dependent_task_id)
+                newly_available.append(dependent_task_id)
         
-        logger.info(f"Task {task_id} completed, newly available: {newly_available}")
+        if task.started_monotonic is not None:
+            elapsed = time.monotonic() - task.started_monotonic
+            logger.info(f"Task {task_id} completed in {elapsed:.1f}s, newly available: {newly_available}")
+        else:
+            logger.info(f"Task {task_id} completed, newly available: {newly_available}")
         return newly_available
     
     def mark_task_failed(self, task_id: str, error: str) -> None:
@@ -78,6 +125,7 @@ class TaskScheduler:
         task.status = TaskStatus.FAILED
         task.error = error
         task.completed_at = datetime.now()
+        self.ready_tasks.discard(task_id)
         
         logger.error(f"Task {task_id} failed: {error}")
     
@@ -102,10 +150,37 @@ class TaskScheduler:
         task.retry_count += 1
         task.error = None
         task.started_at = None
+        task.started_monotonic = None
         task.completed_at = None
+        if task.dependencies_met():
+            self.ready_tasks.add(task_id)
         
         logger.info(f"Retrying task {task_id} (attempt {task.retry_count})")
     
+    def remove_tasks(self, task_ids: List[str]) -> None:
+        """Forget tasks (e.g. of an expired session) so the registry stays bounded"""
+        for task_id in task_ids:
+            task = self.task_registry.pop(task_id, None)
+            if task is None:
+                continue
+            for dep in self.dependency_graph.pop(task_id, ()):
+                dependents = self.reverse_dependencies.get(dep)
+                if dependents is not None:
+                    dependents.discard(task_id)
+                    if not dependents:
+                        del self.reverse_dependencies[dep]
+            self.ready_tasks.discard(task_id)
+            
+            # Surviving dependents keep their edge (a missing dependency is unfinished);
+            # if this task had completed they are blocked on it again
+            dependents = self.reverse_dependencies.get(task_id)
+            if not dependents:
+                self.reverse_dependencies.pop(task_id, None)
+            elif task.status == TaskStatus.COMPLETED:
+                for dependent_task_id in dependents:
+                    self.task_registry[dependent_task_id].pending_dependencies += 1
+                    self.ready_tasks.discard(dependent_task_id)
+    
     def get_task_status(self, task_id: str) -> Optional[TaskStatus]:
         """Get status of a task"""
         task = self.task_registry.get(task_id)
@@ -159,22 +234,26 @@ class TaskScheduler:
     
     def get_execution_order(self) -> List[str]:
         """Get optimal execution order using topological sort"""
-        # Kahn's algorithm for topological sorting
+        # Kahn's algorithm with a priority heap (ties keep insertion order)
         in_degree = {task_id: len(deps) for task_id, deps in self.dependency_graph.items()}
-        queue = [task_id for task_id, degree in in_degree.items() if degree == 0]
+        order = count()
+        heap = [
+            (-self._priority_value(self.task_registry[task_id].priority), next(order), task_id)
+            for task_id, degree in in_degree.items() if degree == 0
+        ]
+        heapq.heapify(heap)
         result = []
         
-        while queue:
-            # Sort by priority
-            queue.sort(key=lambda tid: self._priority_value(self.task_registry[tid].priority), reverse=True)
-            current = queue.pop(0)
+        while heap:
+            current = heapq.heappop(heap)[2]
             result.append(current)
             
             # Update in-degrees of dependent tasks
             for dependent in self.reverse_dependencies.get(current, set()):
                 in_degree[dependent] -= 1
                 if in_degree[dependent] == 0:
-                    queue.append(dependent)
+                    priority = self._priority_value(self.task_registry[dependent].priority)
+                    heapq.heappush(heap, (-priority, next(order), dependent))
         
         if len(result) != len(self.task_registry):
             raise OrchestrationException("Cannot determine execution order due to cycles")
@@ -183,22 +262,18 @@ class TaskScheduler:
     
     def _priority_value(self, priority: TaskPriority) -> int:
         """Convert priority to numeric value for sorting"""
-        priority_map = {
-            TaskPriority.LOW: 1,
-            TaskPriority.NORMAL: 2,
-            TaskPriority.HIGH: 3,
-            TaskPriority.CRITICAL: 4
-        }
-        return priority_map.get(priority, 2)
+        return _PRIORITY_VALUES.get(priority, 2)
     
     def get_statistics(self) -> Dict[str, int]:
         """Get scheduler statistics"""
+        # Single pass over task statuses instead of one filtered list per status
+        counts = Counter(task.status for task in self.task_registry.values())
         stats = {
             'total_tasks': len(self.task_registry),
-            'pending': len(self.get_tasks_by_status(TaskStatus.PENDING)),
-            'running': len(self.get_tasks_by_status(TaskStatus.RUNNING)),
-            'completed': len(self.get_tasks_by_status(TaskStatus.COMPLETED)),
-            'failed': len(self.get_tasks_by_status(TaskStatus.FAILED)),
-            'cancelled': len(self.get_tasks_by_status(TaskStatus.CANCELLED))
+            'pending': counts[TaskStatus.PENDING],
+            'running': counts[TaskStatus.RUNNING],
+            'completed': counts[TaskStatus.COMPLETED],
+            'failed': counts[TaskStatus.FAILED],
+            'cancelled': counts[TaskStatus.CANCELLED]
         }
         return stats
\ No newline at end of file
@@ -5,7 +5,7 @@ Application runners for different project types
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Any
 import asyncio
-import json
+import re
 
 from app.core.logging import get_logger
 from app.core.exceptions import SandboxExecutionException
@@ -14,6 +14,33 @@ from .file_manager import SandboxFileManager
 
 logger = get_logger(__name__)
 
+# Package caches at fixed paths so templates/pooled sandboxes with a warm cache skip downloads
+_INSTALL_CACHE_ENV = {
+    "npm_config_cache": "/home/user/.npm",
+    "YARN_CACHE_FOLDER": "/home/user/.cache/yarn",
+    "PIP_CACHE_DIR": "/home/user/.cache/pip",
+}
+
+
+def _js_install_command(file_manager: SandboxFileManager) -> str:
+    """Pick the JS install command for the lockfile present, preferring cached packages"""
+    if file_manager.get_file('yarn.lock') is not None:
+        return "yarn install --prefer-offline"
+    if file_manager.get_file('package-lock.json') is not None:
+        return "npm ci --prefer-offline --no-audit --no-fund"
+    return "npm install --prefer-offline --no-audit --no-fund"
+
+
+# Main-file content that means the app must be started under uvicorn
+_ASGI_MARKERS = re.compile(r"fastapi|uvicorn", re.IGNORECASE)
+
+# Static previews: busybox httpd (sendfile, keep-alive) when the template has it, else http.server
+_STATIC_SERVE_COMMAND = (
+    "if command -v busybox >/dev/null 2>&1; "
+    "then exec busybox httpd -f -p 8000 -h /home/user/app; "
+    "else exec python -m http.server 8000; fi"
+)
+
 
 class ApplicationRunner(ABC):
     """Abstract base class for application runners"""
@@ -59,36 +86,19 @@ class ReactRunner(ApplicationRunner):
     
     async def can_run(self) -> bool:
         """Check if this is a React project"""
-        package_json = self.file_manager.get_file('package.json')
-        if not package_json:
-            return False
-        
-        try:
-            import json
-            content = json.loads(package_json['content'])
-            dependencies = content.get('dependencies', {})
-            return 'react' in dependencies
-        except (json.JSONDecodeError, KeyError):
+        content = self.file_manager.get_package_json()
+        if content is None:
             return False
+        return 'react' in content.get('dependencies', {})
     
     async def install_dependencies(self) -> str:
         """Install npm dependencies"""
         logger.info(f"Installing React dependencies in sandbox {self.sandbox_id}")
         
-        # Check if package-lock.json exists
-        has_package_lock = self.file_manager.get_file('package-lock.json') is not None
-        has_yarn_lock = self.file_manager.get_file('yarn.lock') is not None
-        
-        if has_yarn_lock:
-            command = "yarn install"
-        elif has_package_lock:
-            command = "npm ci"
-        else:
-            command = "npm install"
-        
         process_id = await self.process_manager.start_process(
-            command=command,
-            working_dir="/home/user/app"
+            command=_js_install_command(self.file_manager),
+            working_dir="/home/user/app",
+            env=_INSTALL_CACHE_ENV
         )
         
         return process_id
@@ -98,21 +108,16 @@ class ReactRunner(ApplicationRunner):
         logger.info(f"Starting React application in sandbox {self.sandbox_id}")
         
         # Try different start commands
-        package_json = self.file_manager.get_file('package.json')
-        if package_json:
-            try:
-                import json
-                content = json.loads(package_json['content'])
-                scripts = content.get('scripts', {})
-                
-                if 'dev' in scripts:
-                    command = "npm run dev"
-                elif 'start' in scripts:
-                    command = "npm start"
-                else:
-                    command = "npx react-scripts start"
-            except (json.JSONDecodeError, KeyError):
+        content = self.file_manager.get_package_json()
+        if content is not None:
+            scripts = content.get('scripts', {})
+            
+            if 'dev' in scripts:
+                command = "npm run dev"
+            elif 'start' in scripts:
                 command = "npm start"
+            else:
+                command = "npx react-scripts start"
         else:
             command = "npm start"
         
@@ -175,7 +180,8 @@ class PythonRunner(ApplicationRunner):
         
         process_id = await self.process_manager.start_process(
             command=command,
-            working_dir="/home/user/app"
+            working_dir="/home/user/app",
+            env=_INSTALL_CACHE_ENV
         )
         
         return process_id
@@ -187,21 +193,18 @@ class PythonRunner(ApplicationRunner):
         # Look for main files
         main_files = ['main.py', 'app.py', 'run.py', 'server.py']
         main_file = None
+        file_info = None
         
         for filename in main_files:
-            if self.file_manager.get_file(filename):
+            file_info = self.file_manager.get_file(filename)
+            if file_info:
                 main_file = filename
                 break
         
         if main_file:
-            # Check if it's a web framework
-            file_info = self.file_manager.get_file(main_file)
-            content = file_info['content'].lower()
-            
-            if 'fastapi' in content or 'uvicorn' in content:
+            # ASGI apps are served by uvicorn; anything else (Flask included) runs directly
+            if _ASGI_MARKERS.search(file_info['content']):
                 command = f"uvicorn {main_file.replace('.py', '')}:app --host 0.0.0.0 --port 8000"
-            elif 'flask' in content:
-                command = f"python {main_file}"
             else:
                 command = f"python {main_file}"
         else:
@@ -249,38 +252,23 @@ class NodeRunner(ApplicationRunner):
     
     async def can_run(self) -> bool:
         """Check if this is a Node.js project"""
-        package_json = self.file_manager.get_file('package.json')
-        if not package_json:
+        content = self.file_manager.get_package_json()
+        if content is None:
             return False
+        dependencies = content.get('dependencies', {})
         
-        try:
-            import json
-            content = json.loads(package_json['content'])
-            dependencies = content.get('dependencies', {})
-            
-            # Check for Node.js specific packages (not React/Vue/Angular)
-            node_packages = ['express', 'koa', 'fastify', 'hapi', 'socket.io']
-            return any(pkg in dependencies for pkg in node_packages)
-        except (json.JSONDecodeError, KeyError):
-            return False
+        # Check for Node.js specific packages (not React/Vue/Angular)
+        node_packages = ['express', 'koa', 'fastify', 'hapi', 'socket.io']
+        return any(pkg in dependencies for pkg in node_packages)
     
     async def install_dependencies(self) -> str:
         """Install npm dependencies"""
         logger.info(f"Installing Node.js dependencies in sandbox {self.sandbox_id}")
         
-        has_package_lock = self.file_manager.get_file('package-lock.json') is not None
-        has_yarn_lock = self.file_manager.get_file('yarn.lock') is not None
-        
-        if has_yarn_lock:
-            command = "yarn install"
-        elif has_package_lock:
-            command = "npm ci"
-        else:
-            command = "npm install"
-        
         process_id = await self.process_manager.start_process(
-            command=command,
-            working_dir="/home/user/app"
+            command=_js_install_command(self.file_manager),
+            working_dir="/home/user/app",
+            env=_INSTALL_CACHE_ENV
         )
         
         return process_id
@@ -289,23 +277,18 @@ class NodeRunner(ApplicationRunner):
         """Start Node.js application"""
         logger.info(f"Starting Node.js application in sandbox {self.sandbox_id}")
         
-        package_json = self.file_manager.get_file('package.json')
-        if package_json:
-            try:
-                import json
-                content = json.loads(package_json['content'])
-                scripts = content.get('scripts', {})
-                
-                if 'dev' in scripts:
-                    command = "npm run dev"
-                elif 'start' in scripts:
-                    command = "npm start"
-                else:
-                    # Look for main file
-                    main = content.get('main', 'index.js')
-                    command = f"node {main}"
-            except (json.JSONDecodeError, KeyError):
-                command = "node index.js"
+        content = self.file_manager.get_package_json()
+        if content is not None:
+            scripts = content.get('scripts', {})
+            
+            if 'dev' in scripts:
+                command = "npm run dev"
+            elif 'start' in scripts:
+                command = "npm start"
+            else:
+                # Look for main file
+                main = content.get('main', 'index.js')
+                command = f"node {main}"
         else:
             command = "node index.js"
         
@@ -371,7 +354,7 @@ class StaticRunner(ApplicationRunner):
         logger.info(f"Starting static file server in sandbox {self.sandbox_id}")
         
         process_id = await self.process_manager.start_process(
-            command="python -m http.server 8000",
+            command=_STATIC_SERVE_COMMAND,
             working_dir="/home/user/app"
         )
         
@@ -4,6 +4,7 @@ File management for sandboxes
 
 import json
 import mimetypes
+import os
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime
@@ -14,6 +15,29 @@ from app.core.config import settings
 
 logger = get_logger(__name__)
 
+# Files whose arrival can change _detect_project_type's answer
+_DETECTION_NAMES = frozenset(('package.json', 'requirements.txt', 'setup.py'))
+_DETECTION_SUFFIXES = ('.jsx', '.tsx', '.py', '.js', '.ts')
+
+# Suffix groups read by _detect_project_type (one membership test per file)
+_PYTHON_MANIFESTS = frozenset(('requirements.txt', 'setup.py'))
+_JSX_SUFFIXES = frozenset(('.jsx', '.tsx'))
+_JS_SUFFIXES = frozenset(('.js', '.ts'))
+
+# Lowercased names kept at the project root by _determine_file_path
+_ROOT_FILES = frozenset((
+    'readme.md', 'package.json', 'requirements.txt', 'dockerfile',
+    'docker-compose.yml', '.gitignore', 'makefile', 'setup.py'
+))
+# Configuration suffixes placed under config/
+_CONFIG_SUFFIXES = frozenset(('.json', '.yaml', '.yml', '.toml', '.ini'))
+# Lowercased names offered as application entry points
+_ENTRY_POINT_FILES = frozenset((
+    'index.html', 'index.js', 'index.ts', 'index.jsx', 'index.tsx',
+    'main.py', 'app.py', 'server.js', 'server.ts',
+    'package.json'  # For npm scripts
+))
+
 
 class SandboxFileManager:
     """Manages files within sandboxes"""
@@ -22,6 +46,9 @@ class SandboxFileManager:
         self.sandbox_id = sandbox_id
         self.files: Dict[str, Dict] = {}
         self.project_type: Optional[str] = None
+        # Parsed root package.json, shared by runner probes until the next write
+        self._package_json: Optional[Dict[str, Any]] = None
+        self._package_json_parsed = False
     
     async def write_files(self, artifacts: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Write multiple files to sandbox"""
@@ -32,23 +59,35 @@ class SandboxFileManager:
             'project_type': None
         }
         
+        self._package_json_parsed = False
+        
         try:
             # Validate file count
             if len(artifacts) > settings.MAX_FILES_PER_SESSION:
                 raise SandboxException(f"Too many files: {len(artifacts)} (max: {settings.MAX_FILES_PER_SESSION})")
             
-            # Write each file
+            # Write each file (hot references bound once outside the loop)
+            created_at = datetime.now().isoformat()
+            write_one = self._write_single_file
+            errors = results['errors']
+            written = 0
+            # Re-detect the project type only if a file that affects it was written
+            redetect = self.project_type is None
             for artifact in artifacts:
                 try:
-                    await self._write_single_file(artifact)
-                    results['files_written'] += 1
+                    name = write_one(artifact, created_at)
+                    written += 1
+                    if not redetect and (name.lower() in _DETECTION_NAMES or name.endswith(_DETECTION_SUFFIXES)):
+                        redetect = True
                 except Exception as e:
                     error_msg = f"Failed to write {artifact.get('name', 'unknown')}: {str(e)}"
-                    results['errors'].append(error_msg)
+                    errors.append(error_msg)
                     logger.error(error_msg)
+            results['files_written'] = written
             
             # Detect project type
-            self.project_type = self._detect_project_type()
+            if redetect:
+                self.project_type = self._detect_project_type()
             results['project_type'] = self.project_type
             
             logger.info(f"Wrote {results['files_written']} files to sandbox {self.sandbox_id}")
@@ -60,8 +99,8 @@ class SandboxFileManager:
         
         return results
     
-    async def _write_single_file(self, artifact: Dict[str, Any]):
-        """Write a single file to sandbox"""
+    def _write_single_file(self, artifact: Dict[str, Any], created_at: str) -> str:
+        """Write a single file to sandbox (in-memory; no I/O to await), returning its name"""
         # Validate artifact
         for required in ('name', 'content'):
             if required not in artifact:
@@ -77,7 +116,7 @@ class SandboxFileManager:
         # Sanitize file name
         safe_name = self._sanitize_filename(file_name)
         # Use only the final component as the display name
-        display_name = safe_name.split('/')[-1]
+        display_name = safe_name.rpartition('/')[2]
         
         # Determine file path
         file_path = self._determine_file_path(safe_name, artifact)
@@ -90,14 +129,15 @@ class SandboxFileManager:
             'size': len(content),
             'type': artifact.get('type', 'unknown'),
             'language': artifact.get('language'),
-            'created_at': datetime.now().isoformat(),
+            'created_at': created_at,
             'mime_type': mimetypes.guess_type(safe_name)[0]
         }
         
         self.files[file_path] = file_info
         
         # In real implementation, this would write to E2B sandbox
-        logger.debug(f"Wrote file {file_path} ({len(content)} bytes) to sandbox {self.sandbox_id}")
+        logger.debug("Wrote file %s (%d bytes) to sandbox %s", file_path, len(content), self.sandbox_id)
+        return display_name
     
     def _sanitize_filename(self, filename: str) -> str:
         """Sanitize filename for security — strips path traversal and dangerous chars."""
@@ -135,12 +175,7 @@ class SandboxFileManager:
         language = artifact.get('language')
         
         # Root level files
-        root_files = [
-            'readme.md', 'package.json', 'requirements.txt', 'dockerfile',
-            'docker-compose.yml', '.gitignore', 'makefile', 'setup.py'
-        ]
-        
-        if name_lower in root_files:
+        if name_lower in _ROOT_FILES:
             return filename
         
         # Determine directory based on type and language
@@ -150,7 +185,7 @@ class SandboxFileManager:
             return f"docs/{filename}"
         
         elif file_type == 'configuration':
-            if name_lower.endswith(('.json', '.yaml', '.yml', '.toml', '.ini')):
+            if os.path.splitext(name_lower)[1] in _CONFIG_SUFFIXES:
                 return f"config/{filename}"
             return filename
         
@@ -179,43 +214,52 @@ class SandboxFileManager:
         return f"src/{filename}"
     
     def _detect_project_type(self) -> Optional[str]:
-        """Detect project type based on files"""
-        file_names = [info['name'].lower() for info in self.files.values()]
+        """Detect project type based on files (one pass over the file table)"""
+        package_json = None
+        has_python_manifest = has_jsx = has_py = has_js = False
+        for info in self.files.values():
+            name = info['name']
+            lower = name.lower()
+            if lower == 'package.json':
+                if package_json is None:
+                    package_json = info
+            elif lower in _PYTHON_MANIFESTS:
+                has_python_manifest = True
+            suffix = os.path.splitext(name)[1]
+            if suffix in _JSX_SUFFIXES:
+                has_jsx = True
+            elif suffix == '.py':
+                has_py = True
+            elif suffix in _JS_SUFFIXES:
+                has_js = True
         
         # React project
-        if 'package.json' in file_names:
-            package_json = next((f for f in self.files.values() if f['name'].lower() == 'package.json'), None)
-            if package_json:
-                try:
-                    content = json.loads(package_json['content'])
-                    dependencies = content.get('dependencies', {})
-                    if 'react' in dependencies:
-                        return 'react'
-                    elif 'vue' in dependencies:
-                        return 'vue'
-                    elif 'angular' in dependencies:
-                        return 'angular'
-                    elif 'express' in dependencies:
-                        return 'node'
-                    else:
-                        return 'javascript'
-                except json.JSONDecodeError:
-                    pass
+        if package_json:
+            try:
+                content = json.loads(package_json['content'])
+                dependencies = content.get('dependencies', {})
+                if 'react' in dependencies:
+                    return 'react'
+                elif 'vue' in dependencies:
+                    return 'vue'
+                elif 'angular' in dependencies:
+                    return 'angular'
+                elif 'express' in dependencies:
+                    return 'node'
+                else:
+                    return 'javascript'
+            except json.JSONDecodeError:
+                pass
         
         # Python project
-        if 'requirements.txt' in file_names or 'setup.py' in file_names:
+        if has_python_manifest:
             return 'python'
         
         # Check for specific frameworks
-        has_jsx = any(f['name'].endswith(('.jsx', '.tsx')) for f in self.files.values())
         if has_jsx:
             return 'react'
-        
-        has_py = any(f['name'].endswith('.py') for f in self.files.values())
         if has_py:
             return 'python'
-        
-        has_js = any(f['name'].endswith(('.js', '.ts')) for f in self.files.values())
         if has_js:
             return 'javascript'
         
@@ -225,6 +269,21 @@ class SandboxFileManager:
         """Get file information"""
         return self.files.get(file_path)
     
+    def get_package_json(self) -> Optional[Dict[str, Any]]:
+        """Get the parsed root package.json (None if missing or invalid), parsed once per write"""
+        if not self._package_json_parsed:
+            self._package_json = None
+            package_json = self.files.get('package.json')
+            if package_json:
+                try:
+                    content = json.loads(package_json['content'])
+                    if isinstance(content, dict):
+                        self._package_json = content
+                except json.JSONDecodeError:
+                    pass
+            self._package_json_parsed = True
+        return self._package_json
+    
     def get_all_files(self) -> List[Dict]:
         """Get all files"""
         return list(self.files.values())
@@ -259,20 +318,11 @@ class SandboxFileManager:
     
     def get_entry_points(self) -> List[str]:
         """Get potential entry points for the application"""
-        entry_points = []
-        
         # Common entry point files
-        common_entries = [
-            'index.html', 'index.js', 'index.ts', 'index.jsx', 'index.tsx',
-            'main.py', 'app.py', 'server.js', 'server.ts',
-            'package.json'  # For npm scripts
+        return [
+            file_info['path'] for file_info in self.files.values()
+            if file_info['name'].lower() in _ENTRY_POINT_FILES
         ]
-        
-        for file_info in self.files.values():
-            if file_info['name'].lower() in common_entries:
-                entry_points.append(file_info['path'])
-        
-        return entry_points
     
     def get_run_commands(self) -> List[str]:
         """Get suggested run commands based on project type"""
@@ -2,10 +2,19 @@
 Data models for sandbox system
 """
 
+import time
+from collections import deque
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
-from typing import Dict, List, Optional, Any
+from typing import Deque, Dict, List, Optional, Any
+
+# Lines of stdout/stderr kept per process (oldest dropped first)
+_OUTPUT_BUFFER_LINES = 1000
+
+
+def _output_buffer() -> Deque[str]:
+    return deque(maxlen=_OUTPUT_BUFFER_LINES)
 
 
 class SandboxState(str, Enum):
@@ -27,7 +36,7 @@ class ProcessState(str, Enum):
     KILLED = "killed"
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcessInfo:
     """Information about a running process"""
     id: str
@@ -37,32 +46,26 @@ class ProcessInfo:
     started_at: datetime = field(default_factory=datetime.now)
     completed_at: Optional[datetime] = None
     exit_code: Optional[int] = None
-    stdout_buffer: List[str] = field(default_factory=list)
-    stderr_buffer: List[str] = field(default_factory=list)
+    stdout_buffer: Deque[str] = field(default_factory=_output_buffer)
+    stderr_buffer: Deque[str] = field(default_factory=_output_buffer)
     
     def add_stdout(self, line: str):
-        """Add line to stdout buffer"""
+        """Add line to stdout buffer (bounded; oldest lines fall off)"""
         self.stdout_buffer.append(line)
-        # Keep only last 1000 lines
-        if len(self.stdout_buffer) > 1000:
-            self.stdout_buffer = self.stdout_buffer[-1000:]
     
     def add_stderr(self, line: str):
-        """Add line to stderr buffer"""
+        """Add line to stderr buffer (bounded; oldest lines fall off)"""
         self.stderr_buffer.append(line)
-        # Keep only last 1000 lines
-        if len(self.stderr_buffer) > 1000:
-            self.stderr_buffer = self.stderr_buffer[-1000:]
     
     def get_recent_output(self, lines: int = 50) -> Dict[str, List[str]]:
         """Get recent output"""
         return {
-            'stdout': self.stdout_buffer[-lines:],
-            'stderr': self.stderr_buffer[-lines:]
+            'stdout': list(self.stdout_buffer)[-lines:],
+            'stderr': list(self.stderr_buffer)[-lines:]
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class SandboxInfo:
     """Information about a sandbox"""
     id: str
@@ -75,12 +78,27 @@ class SandboxInfo:
     preview_url: Optional[str] = None
     project_type: Optional[str] = None
     metrics: Dict[str, Any] = field(default_factory=dict)
-    last_activity: datetime = field(default_factory=datetime.now)
     resource_usage: Dict[str, float] = field(default_factory=dict)
+    timeout: Optional[int] = None  # seconds; E2B shuts the sandbox down after this
+    created_monotonic: float = field(default_factory=time.monotonic)
+    last_activity_monotonic: float = field(default_factory=time.monotonic)
+    
+    @property
+    def last_activity(self) -> datetime:
+        """Wall-clock time of last activity, derived from the creation timestamp"""
+        return self.created_at + timedelta(seconds=self.last_activity_monotonic - self.created_monotonic)
+    
+    def is_expired(self, now: float) -> bool:
+        """Whether the sandbox has outlived its E2B timeout"""
+        return self.timeout is not None and now - self.created_monotonic > self.timeout
+    
+    def idle_seconds(self, now: float) -> float:
+        """Seconds since the last recorded activity"""
+        return now - self.last_activity_monotonic
     
     def update_activity(self):
         """Update last activity timestamp"""
-        self.last_activity = datetime.now()
+        self.last_activity_monotonic = time.monotonic()
     
     def add_process(self, process: ProcessInfo):
         """Add a process to the sandbox"""
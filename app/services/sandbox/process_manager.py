@@ -3,7 +3,8 @@ Process management for sandboxes
 """
 
 import asyncio
-import uuid
+import itertools
+from collections import Counter
 from typing import Dict, List, Optional, Callable
 from datetime import datetime
 
@@ -21,6 +22,8 @@ class ProcessManager:
         self.sandbox_id = sandbox_id
         self.processes: Dict[str, ProcessInfo] = {}
         self.output_callbacks: Dict[str, List[Callable]] = {}
+        # Process IDs only need to be unique within this sandbox
+        self._process_seq = itertools.count(1)
     
     async def start_process(
         self, 
@@ -29,7 +32,7 @@ class ProcessManager:
         env: Optional[Dict[str, str]] = None
     ) -> str:
         """Start a new process"""
-        process_id = str(uuid.uuid4())
+        process_id = f"proc_{next(self._process_seq):08x}"
         
         try:
             # Create process info
@@ -227,13 +230,11 @@ class ProcessManager:
     def get_statistics(self) -> Dict:
         """Get process statistics"""
         total_processes = len(self.processes)
-        state_counts = {}
-        
-        for state in ProcessState:
-            state_counts[state.value] = len([p for p in self.processes.values() if p.state == state])
+        counts = Counter(p.state for p in self.processes.values())
+        state_counts = {state.value: counts[state] for state in ProcessState}
         
         return {
             'total_processes': total_processes,
             'state_distribution': state_counts,
-            'running_processes': len(self.get_running_processes())
+            'running_processes': counts[ProcessState.RUNNING]
         }
\ No newline at end of file
@@ -3,20 +3,61 @@ Main sandbox management system
 """
 
 import asyncio
+import heapq
+import time
 import uuid
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 
 from app.core.logging import get_logger
 from app.core.exceptions import SandboxException, SandboxCreationException, SandboxExecutionException
 from app.core.config import settings
-from .models import SandboxInfo, SandboxState, SandboxConfig
+from .models import SandboxInfo, SandboxState, SandboxConfig, ProcessState
 from .process_manager import ProcessManager
 from .file_manager import SandboxFileManager
-from .application_runners import ApplicationRunnerFactory
+from .application_runners import ApplicationRunnerFactory, StaticRunner
 
 logger = get_logger(__name__)
 
+# Worker threads for blocking E2B SDK calls (kept apart from the default executor)
+_E2B_MAX_WORKERS = 16
+
+# Pooled sandboxes boot with this much lifetime beyond E2B_TIMEOUT to spend waiting in the pool
+_POOL_MAX_IDLE = 300  # seconds
+
+# How often idle and expired sandboxes are swept
+_CLEANUP_INTERVAL = 60  # seconds
+
+# Stopped/errored sandboxes idle this long are removed
+_INACTIVE_SANDBOX_SECONDS = 2 * 3600
+
+# Served when a sandbox is run before any files were generated
+_PLACEHOLDER_ARTIFACT: Dict[str, Any] = {
+    'name': 'index.html',
+    'file_path': 'index.html',
+    'type': 'code',
+    'language': 'html',
+    'content': (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>No files generated</title></head>\n"
+        "<body><h1>No files generated</h1><p>This session has not produced any files yet.</p></body></html>\n"
+    ),
+}
+
+# e2b.Sandbox, resolved on first use (the SDK is an optional dependency)
+_sandbox_class: Optional[type] = None
+
+
+def _get_sandbox_class() -> type:
+    """Import the E2B Sandbox class once; raises ImportError if the SDK is missing"""
+    global _sandbox_class
+    if _sandbox_class is None:
+        from e2b import Sandbox
+        _sandbox_class = Sandbox
+    return _sandbox_class
+
 
 class SandboxManager:
     """Main sandbox management system"""
@@ -25,8 +66,20 @@ class SandboxManager:
         self.sandboxes: Dict[str, SandboxInfo] = {}
         self.process_managers: Dict[str, ProcessManager] = {}
         self.file_managers: Dict[str, SandboxFileManager] = {}
+        # (monotonic deadline, sandbox_id); entries are re-checked when due (lazy deletion)
+        self._expiry_heap: List[Tuple[float, str]] = []
+        # Runner picked for each sandbox's current files; dropped when files change
+        self._runner_classes: Dict[str, type] = {}
         self.cleanup_task = None
         self._background_tasks_started = False
+        self._e2b_executor = ThreadPoolExecutor(
+            max_workers=_E2B_MAX_WORKERS, thread_name_prefix='e2b'
+        )
+        # Warm E2B sandboxes with the default template: (monotonic created time, boot timeout, sandbox)
+        self._pool: Deque[Tuple[float, int, Any]] = deque()
+        self._pool_refill_task: Optional[asyncio.Task] = None
+        # Called with (sandbox_id, session_id) after a sandbox is removed
+        self.removal_callbacks: List[Callable[[str, str], None]] = []
     
     def _start_background_tasks(self):
         """Start background maintenance tasks"""
@@ -34,11 +87,67 @@ class SandboxManager:
             try:
                 if not self.cleanup_task:
                     self.cleanup_task = asyncio.create_task(self._cleanup_loop())
+                self._schedule_pool_refill()
                 self._background_tasks_started = True
             except RuntimeError:
                 # No event loop running, tasks will be started when needed
                 pass
     
+    def _schedule_pool_refill(self):
+        """Top the warm pool back up in the background (one refill at a time)"""
+        if settings.E2B_POOL_SIZE <= 0 or not settings.ENABLE_E2B or not settings.E2B_API_KEY:
+            return
+        if self._pool_refill_task and not self._pool_refill_task.done():
+            return
+        self._pool_refill_task = asyncio.create_task(self._refill_pool())
+    
+    async def _refill_pool(self):
+        """Boot default-template sandboxes until the pool is full"""
+        loop = asyncio.get_running_loop()
+        boot_timeout = settings.E2B_TIMEOUT + _POOL_MAX_IDLE
+        while len(self._pool) < settings.E2B_POOL_SIZE:
+            # E2B's clock starts at creation; take the earlier reading to stay conservative
+            created = time.monotonic()
+            try:
+                sandbox = await loop.run_in_executor(
+                    self._e2b_executor,
+                    partial(
+                        _get_sandbox_class(),
+                        template=settings.E2B_TEMPLATE_ID,
+                        api_key=settings.E2B_API_KEY,
+                        timeout=boot_timeout
+                    )
+                )
+            except Exception as e:
+                logger.warning(f"Failed to boot pooled E2B sandbox: {e}")
+                return
+            self._pool.append((created, boot_timeout, sandbox))
+        logger.debug(f"E2B sandbox pool filled ({len(self._pool)})")
+    
+    def _take_pooled_sandbox(self, config: SandboxConfig) -> Optional[Tuple[float, int, Any]]:
+        """Hand out a warm sandbox that outlives config.timeout, dropping ones idle too long"""
+        if config.template_id != settings.E2B_TEMPLATE_ID:
+            return None
+        
+        now = time.monotonic()
+        taken = None
+        kept = []
+        while self._pool:
+            entry = self._pool.popleft()
+            created, boot_timeout, candidate = entry
+            remaining = created + boot_timeout - now
+            if taken is None and remaining >= config.timeout:
+                taken = entry
+            elif remaining < settings.E2B_TIMEOUT:
+                # Too short-lived for a default session; nobody will take it
+                self._e2b_executor.submit(candidate.close)
+            else:
+                kept.append(entry)
+        self._pool.extend(kept)
+        
+        self._schedule_pool_refill()
+        return taken
+    
     async def create_sandbox(self, session_id: str, config: Optional[SandboxConfig] = None) -> str:
         """Create a new sandbox"""
         # Start background tasks if not already started
@@ -61,7 +170,8 @@ class SandboxManager:
             sandbox_info = SandboxInfo(
                 id=sandbox_id,
                 session_id=session_id,
-                state=SandboxState.CREATING
+                state=SandboxState.CREATING,
+                timeout=config.timeout
             )
             
             # Initialize managers
@@ -78,6 +188,7 @@ class SandboxManager:
             
             sandbox_info.state = SandboxState.READY
             sandbox_info.update_activity()
+            heapq.heappush(self._expiry_heap, (self._next_deadline(sandbox_info), sandbox_id))
             
             logger.info(f"Created sandbox {sandbox_id} for session {session_id}")
             return sandbox_id
@@ -100,21 +211,31 @@ class SandboxManager:
             logger.debug(f"Creating E2B sandbox {sandbox_info.id} with config: {config.to_dict()}")
             
             # Import E2B SDK
-            from e2b import Sandbox
-            
-            # Create actual E2B sandbox with configuration
-            sandbox = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: Sandbox(
-                    template=config.template_id,
-                    api_key=settings.E2B_API_KEY,
-                    timeout=config.timeout,
-                    metadata={
-                        'session_id': sandbox_info.session_id,
-                        'sandbox_id': sandbox_info.id
-                    }
+            Sandbox = _get_sandbox_class()
+            
+            # Prefer a warm pooled sandbox (booted without session metadata)
+            pooled = self._take_pooled_sandbox(config)
+            if pooled is not None:
+                created, boot_timeout, sandbox = pooled
+                # Its E2B lifetime started when it was booted into the pool
+                sandbox_info.created_at -= timedelta(seconds=sandbox_info.created_monotonic - created)
+                sandbox_info.created_monotonic = created
+                sandbox_info.timeout = boot_timeout
+            else:
+                # Create actual E2B sandbox with configuration
+                sandbox = await asyncio.get_running_loop().run_in_executor(
+                    self._e2b_executor,
+                    partial(
+                        Sandbox,
+                        template=config.template_id,
+                        api_key=settings.E2B_API_KEY,
+                        timeout=config.timeout,
+                        metadata={
+                            'session_id': sandbox_info.session_id,
+                            'sandbox_id': sandbox_info.id
+                        }
+                    )
                 )
-            )
             
             # Store the actual E2B sandbox instance
             sandbox_info.sandbox_instance = sandbox
@@ -146,9 +267,11 @@ class SandboxManager:
         try:
             file_manager = self.file_managers[sandbox_id]
             result = await file_manager.write_files(artifacts)
+            self._runner_classes.pop(sandbox_id, None)
             
             # Update sandbox info
-            sandbox_info.files = [f['path'] for f in file_manager.get_all_files()]
+            # File table is keyed by path
+            sandbox_info.files = list(file_manager.files)
             sandbox_info.project_type = file_manager.project_type
             sandbox_info.update_activity()
             
@@ -169,18 +292,28 @@ class SandboxManager:
             process_manager = self.process_managers[sandbox_id]
             file_manager = self.file_managers[sandbox_id]
             
-            # Get appropriate runner
-            runner = await ApplicationRunnerFactory.get_best_runner(
-                sandbox_id, process_manager, file_manager
-            )
+            empty_project = not command and not file_manager.files
+            if empty_project:
+                # Nothing generated: serve a placeholder page; no detection or install needed
+                await file_manager.write_files([_PLACEHOLDER_ARTIFACT])
+                sandbox_info.files = list(file_manager.files)
+                sandbox_info.project_type = file_manager.project_type
+                runner = StaticRunner(sandbox_id, process_manager, file_manager)
+            else:
+                # Get appropriate runner (detection reruns only after files change)
+                runner_cls = self._runner_classes.get(sandbox_id)
+                if runner_cls:
+                    runner = runner_cls(sandbox_id, process_manager, file_manager)
+                else:
+                    runner = await ApplicationRunnerFactory.get_best_runner(
+                        sandbox_id, process_manager, file_manager
+                    )
+                    self._runner_classes[sandbox_id] = type(runner)
             
             sandbox_info.state = SandboxState.RUNNING
             
-            # Install dependencies first
-            install_process_id = await runner.install_dependencies()
-            
-            # Wait for installation to complete (simplified)
-            await asyncio.sleep(2)
+            # Install dependencies first; start_process returns once the install has run
+            install_process_id = None if empty_project else await runner.install_dependencies()
             
             # Start application
             if command:
@@ -290,7 +423,7 @@ class SandboxManager:
             'project_type': sandbox_info.project_type,
             'file_count': len(sandbox_info.files),
             'process_count': sandbox_info.get_process_count(),
-            'running_processes': len(sandbox_info.get_running_processes()),
+            'running_processes': sum(1 for p in sandbox_info.processes.values() if p.state == ProcessState.RUNNING),
             'resource_usage': sandbox_info.resource_usage,
             'process_stats': process_manager.get_statistics() if process_manager else {},
             'file_stats': file_manager.get_statistics() if file_manager else {}
@@ -313,6 +446,18 @@ class SandboxManager:
             logger.error(f"Failed to cleanup sandbox {sandbox_id}: {e}")
             return False
     
+    def add_removal_callback(self, callback: Callable[[str, str], None]):
+        """Add callback for sandbox removal (explicit cleanup or inactivity sweep)"""
+        self.removal_callbacks.append(callback)
+    
+    def _notify_removal_callbacks(self, sandbox_id: str, session_id: str):
+        """Notify removal callbacks"""
+        for callback in self.removal_callbacks:
+            try:
+                callback(sandbox_id, session_id)
+            except Exception as e:
+                logger.error(f"Error in sandbox removal callback: {e}")
+    
     async def _cleanup_sandbox(self, sandbox_id: str):
         """Internal cleanup method"""
         # Stop all processes
@@ -330,8 +475,8 @@ class SandboxManager:
                     # Check if it's a real E2B Sandbox object
                     if hasattr(sandbox_info.sandbox_instance, 'close'):
                         logger.debug(f"Closing real E2B sandbox {sandbox_id}")
-                        await asyncio.get_event_loop().run_in_executor(
-                            None,
+                        await asyncio.get_running_loop().run_in_executor(
+                            self._e2b_executor,
                             sandbox_info.sandbox_instance.close
                         )
                         logger.info(f"✅ E2B sandbox {sandbox_id} closed successfully")
@@ -339,9 +484,12 @@ class SandboxManager:
                     logger.warning(f"Failed to close E2B sandbox {sandbox_id}: {e}")
         
         # Remove from all collections
-        self.sandboxes.pop(sandbox_id, None)
+        sandbox_info = self.sandboxes.pop(sandbox_id, None)
         self.process_managers.pop(sandbox_id, None)
         self.file_managers.pop(sandbox_id, None)
+        self._runner_classes.pop(sandbox_id, None)
+        if sandbox_info is not None:
+            self._notify_removal_callbacks(sandbox_id, sandbox_info.session_id)
         
         logger.debug(f"Sandbox {sandbox_id} cleaned up")
     
@@ -349,26 +497,55 @@ class SandboxManager:
         """Background cleanup loop"""
         while True:
             try:
-                await asyncio.sleep(1800)  # Run every 30 minutes
+                await asyncio.sleep(_CLEANUP_INTERVAL)
                 await self._cleanup_inactive_sandboxes()
             except Exception as e:
                 logger.error(f"Cleanup loop error: {e}")
     
+    @staticmethod
+    def _next_deadline(sandbox_info: SandboxInfo) -> float:
+        """Monotonic time at which the sandbox should next be checked for removal"""
+        if sandbox_info.timeout is not None:
+            return sandbox_info.created_monotonic + sandbox_info.timeout
+        return sandbox_info.last_activity_monotonic + _INACTIVE_SANDBOX_SECONDS
+    
     async def _cleanup_inactive_sandboxes(self):
-        """Clean up inactive sandboxes"""
-        cutoff_time = datetime.now() - timedelta(hours=2)  # 2 hours
+        """Clean up inactive sandboxes and ones past their E2B timeout"""
+        now = time.monotonic()
+        heap = self._expiry_heap
+        if not heap or heap[0][0] > now:
+            # Common tick: nothing due, nothing to allocate
+            return
         
+        # Only entries whose deadline has passed are looked at
         sandboxes_to_cleanup = []
-        for sandbox_id, sandbox_info in self.sandboxes.items():
-            if (sandbox_info.last_activity < cutoff_time and
-                sandbox_info.state in [SandboxState.STOPPED, SandboxState.ERROR]):
+        recheck: List[Tuple[float, str]] = []
+        while heap and heap[0][0] <= now:
+            _, sandbox_id = heapq.heappop(heap)
+            sandbox_info = self.sandboxes.get(sandbox_id)
+            if sandbox_info is None:
+                continue
+            if sandbox_info.is_expired(now) or (
+                sandbox_info.idle_seconds(now) > _INACTIVE_SANDBOX_SECONDS and
+                sandbox_info.state in [SandboxState.STOPPED, SandboxState.ERROR]
+            ):
                 sandboxes_to_cleanup.append(sandbox_id)
+            else:
+                # Still in use: look again at its next deadline (at least one sweep away)
+                recheck.append((max(self._next_deadline(sandbox_info), now + _CLEANUP_INTERVAL), sandbox_id))
+        for entry in recheck:
+            heapq.heappush(heap, entry)
         
-        for sandbox_id in sandboxes_to_cleanup:
-            await self._cleanup_sandbox(sandbox_id)
+        # Close concurrently; each result is handled as soon as that sandbox is done
+        cleaned = 0
+        for finished in asyncio.as_completed(
+            [self.cleanup_sandbox(sandbox_id) for sandbox_id in sandboxes_to_cleanup]
+        ):
+            if await finished:
+                cleaned += 1
         
         if sandboxes_to_cleanup:
-            logger.info(f"Cleaned up {len(sandboxes_to_cleanup)} inactive sandboxes")
+            logger.info(f"Cleaned up {cleaned}/{len(sandboxes_to_cleanup)} inactive sandboxes")
     
     def get_all_sandboxes(self) -> List[Dict[str, Any]]:
         """Get all sandboxes"""
@@ -377,13 +554,16 @@ class SandboxManager:
     def get_statistics(self) -> Dict[str, Any]:
         """Get sandbox statistics"""
         total_sandboxes = len(self.sandboxes)
-        state_counts = {}
-        
-        for state in SandboxState:
-            state_counts[state.value] = len([s for s in self.sandboxes.values() if s.state == state])
+        counts = Counter(s.state for s in self.sandboxes.values())
+        state_counts = {state.value: counts[state] for state in SandboxState}
         
         total_processes = sum(len(pm.processes) for pm in self.process_managers.values())
-        running_processes = sum(len(pm.get_running_processes()) for pm in self.process_managers.values())
+        running_processes = sum(
+            1
+            for pm in self.process_managers.values()
+            for p in pm.processes.values()
+            if p.state == ProcessState.RUNNING
+        )
         
         return {
             'total_sandboxes': total_sandboxes,
@@ -4,8 +4,10 @@ Replaces WebSocket manager — works in Vercel serverless.
 """
 
 import asyncio
+import base64
 import json
-from typing import Dict, Any, Optional, AsyncGenerator
+import zlib
+from typing import Dict, Any, Iterable, List, Optional, AsyncGenerator, Tuple
 from datetime import datetime
 
 from app.core.logging import get_logger
@@ -13,9 +15,27 @@ from app.core.logging import get_logger
 logger = get_logger(__name__)
 
 # In-memory event queues per client_id
-# Each client gets an asyncio.Queue of SSE-formatted strings
+# Each client gets an asyncio.Queue of (SSE-formatted string, ends-stream flag)
 _queues: Dict[str, asyncio.Queue] = {}
 
+# Event types after which the stream is closed
+_TERMINAL_TYPES = frozenset(("stream_end", "error"))
+
+# Max queued events coalesced into a single stream write
+_MAX_BATCH_EVENTS = 50
+
+# Limits per artifacts_batch event (items, approximate content bytes)
+_ARTIFACT_BATCH_MAX_ITEMS = 64
+_ARTIFACT_BATCH_MAX_BYTES = 256 * 1024
+
+# Artifact contents at least this large are sent zlib-compressed and base64'd
+_COMPRESS_MIN_BYTES = 1024
+_CONTENT_ENCODING = "deflate+base64"
+
+# Latest unsent progress event per client; only the newest value is delivered
+_pending_progress: Dict[str, Dict[str, Any]] = {}
+_PROGRESS_FLUSH_SECONDS = 0.05
+
 
 def _get_queue(client_id: str) -> asyncio.Queue:
     if client_id not in _queues:
@@ -25,6 +45,7 @@ def _get_queue(client_id: str) -> asyncio.Queue:
 
 def _remove_queue(client_id: str):
     _queues.pop(client_id, None)
+    _pending_progress.pop(client_id, None)
 
 
 def _format_event(data: Dict[str, Any]) -> str:
@@ -33,15 +54,88 @@ def _format_event(data: Dict[str, Any]) -> str:
     return f"data: {payload}\n\n"
 
 
+def _artifact_batches(artifacts: List[Dict[str, Any]]) -> Iterable[List[Dict[str, Any]]]:
+    """Split artifacts into chunks capped by item count and content size."""
+    chunk: List[Dict[str, Any]] = []
+    chunk_bytes = 0
+    for artifact in artifacts:
+        size = artifact.get("size", 0)
+        if chunk and (len(chunk) >= _ARTIFACT_BATCH_MAX_ITEMS
+                      or chunk_bytes + size > _ARTIFACT_BATCH_MAX_BYTES):
+            yield chunk
+            chunk, chunk_bytes = [], 0
+        chunk.append(artifact)
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
+
+def _compact_artifact(artifact: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the artifact with large text content compressed for the wire."""
+    content = artifact.get("content")
+    if not isinstance(content, str) or len(content) < _COMPRESS_MIN_BYTES:
+        return artifact
+    packed = base64.b64encode(zlib.compress(content.encode("utf-8"), 6)).decode("ascii")
+    return {**artifact, "content": packed, "content_encoding": _CONTENT_ENCODING}
+
+
+async def _push_artifacts(client_id: str, artifacts: List[Dict[str, Any]]):
+    """Push artifacts as a few artifacts_batch events instead of one per artifact."""
+    await _push_many(client_id, (
+        {"type": "artifacts_batch", "items": [_compact_artifact(a) for a in chunk]}
+        for chunk in _artifact_batches(artifacts)
+    ))
+
+
+def _queue_item(data: Dict[str, Any]) -> Tuple[str, bool]:
+    """Format an event and flag whether it ends the stream (no re-parse later)."""
+    return _format_event(data), data.get("type") in _TERMINAL_TYPES
+
+
+def _flush_progress(client_id: str):
+    """Enqueue the client's pending progress event, if any."""
+    data = _pending_progress.pop(client_id, None)
+    if data is None:
+        return
+    try:
+        _get_queue(client_id).put_nowait(_queue_item(data))
+    except asyncio.QueueFull:
+        logger.warning(f"SSE queue full for client {client_id}, dropping progress")
+
+
+def _push_progress(client_id: str, data: Dict[str, Any]):
+    """Record a progress event; bursts are coalesced and flushed after a short delay."""
+    schedule = client_id not in _pending_progress
+    _pending_progress[client_id] = data
+    if schedule:
+        asyncio.get_running_loop().call_later(_PROGRESS_FLUSH_SECONDS, _flush_progress, client_id)
+
+
 async def _push(client_id: str, data: Dict[str, Any]):
     """Push an event to a client's queue (non-blocking, drops if full)."""
+    # Keep ordering: pending progress goes out before anything pushed after it
+    _flush_progress(client_id)
     q = _get_queue(client_id)
     try:
-        q.put_nowait(_format_event(data))
+        q.put_nowait(_queue_item(data))
     except asyncio.QueueFull:
         logger.warning(f"SSE queue full for client {client_id}, dropping event")
 
 
+async def _push_many(client_id: str, events: Iterable[Dict[str, Any]]):
+    """Push several events to a client's queue in one call (drops overflow)."""
+    _flush_progress(client_id)
+    q = _get_queue(client_id)
+    dropped = 0
+    for data in events:
+        try:
+            q.put_nowait(_queue_item(data))
+        except asyncio.QueueFull:
+            dropped += 1
+    if dropped:
+        logger.warning(f"SSE queue full for client {client_id}, dropped {dropped} events")
+
+
 async def event_stream(client_id: str) -> AsyncGenerator[str, None]:
     """
     Async generator consumed by StreamingResponse.
@@ -58,16 +152,18 @@ async def event_stream(client_id: str) -> AsyncGenerator[str, None]:
         while True:
             try:
                 # Wait up to 25s then send a keep-alive comment
-                event = await asyncio.wait_for(q.get(), timeout=25)
-                yield event
+                event, done = await asyncio.wait_for(q.get(), timeout=25)
+
+                # Coalesce whatever else is already queued into one write
+                batch: List[str] = [event]
+                while not done and not q.empty() and len(batch) < _MAX_BATCH_EVENTS:
+                    event, done = q.get_nowait()
+                    batch.append(event)
+                yield "".join(batch)
 
                 # Signal the consumer that we're done streaming
-                try:
-                    payload = json.loads(event.removeprefix("data: ").rstrip())
-                    if payload.get("type") in ("stream_end", "error"):
-                        break
-                except (json.JSONDecodeError, ValueError):
-                    pass
+                if done:
+                    break
             except asyncio.TimeoutError:
                 # Keep-alive ping so Vercel doesn't close the connection
                 yield ": ping\n\n"
@@ -85,7 +181,7 @@ class SSEManager:
                                    status: str, progress: int, message: str,
                                    current_agent: Optional[str] = None,
                                    estimated_time: Optional[str] = None):
-        await _push(client_id, {
+        _push_progress(client_id, {
             "type": "progress_update",
             "generation_id": generation_id,
             "status": status,
@@ -111,6 +207,9 @@ class SSEManager:
     async def send_artifact_update(self, client_id: str, artifact: Dict[str, Any]):
         await _push(client_id, {"type": "artifact_update", "artifact": artifact})
 
+    async def send_artifacts_batch(self, client_id: str, artifacts: List[Dict[str, Any]]):
+        await _push_artifacts(client_id, artifacts)
+
     async def send_streaming_content(self, client_id: str, content: str,
                                      agent_role: str,
                                      artifact_name: Optional[str] = None):
@@ -2,10 +2,21 @@
  * SSE (Server-Sent Events) client — replaces WebSocket for Vercel serverless.
  * Provides the same event-listener interface the Results page expects.
  */
+
+// Inflate artifact content the server sent as zlib + base64 (large files only)
+async function inflateArtifact({ content_encoding, ...artifact }) {
+  if (content_encoding !== 'deflate+base64') return artifact
+  const bytes = Uint8Array.from(atob(artifact.content), c => c.charCodeAt(0))
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'))
+  return { ...artifact, content: await new Response(stream).text() }
+}
+
 class SSEService {
   constructor() {
     this.es = null
     this.listeners = new Map()
+    // Dispatch chain: keeps events in order while compressed artifacts inflate
+    this.pending = Promise.resolve()
   }
 
   /**
@@ -30,7 +41,7 @@ class SSEService {
       this.es.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data)
-          this._dispatch(data)
+          this.pending = this.pending.then(() => this._dispatch(data)).catch(e => console.error('SSE dispatch error:', e))
         } catch {
           // ignore malformed frames
         }
@@ -64,11 +75,16 @@ class SSEService {
 
   // ── internal ──────────────────────────────────────────────────────────────
 
-  _dispatch(data) {
+  async _dispatch(data) {
     switch (data.type) {
       case 'progress_update':    this._notify('progress', data); break
       case 'agent_update':       this._notify('agent_update', data); break
       case 'artifact_update':    this._notify('artifact_update', data); break
+      case 'artifacts_batch':
+        for (const item of data.items ?? []) {
+          this._notify('artifact_update', { type: 'artifact_update', artifact: await inflateArtifact(item) })
+        }
+        break
       case 'streaming_content':  this._notify('streaming_content', data); break
       case 'error':              this._notify('error', data); break
       case 'stream_end':         this._notify('close', data); this.disconnect(); break
@@ -0,0 +1,120 @@
+import asyncio
+import io
+import json
+
+from app.models.schemas import BedrockModel
+from app.services import bedrock_client
+from app.services.bedrock_client import BedrockClient
+
+
+class FakeEventStream:
+    def __init__(self, texts, error=None):
+        self.texts = texts
+        self.error = error
+        self.closed = False
+
+    def __iter__(self):
+        for text in self.texts:
+            chunk = {"type": "content_block_delta", "delta": {"text": text}}
+            yield {"chunk": {"bytes": json.dumps(chunk).encode()}}
+        if self.error:
+            raise self.error
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRuntimeClient:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        return {"body": self.stream}
+
+
+def make_client(stream):
+    client = BedrockClient()
+    client.client = FakeRuntimeClient(stream)
+    return client
+
+
+def test_stream_model_yields_text_and_closes_stream():
+    stream = FakeEventStream(["Hello", ", ", "world"])
+    client = make_client(stream)
+
+    async def run():
+        return [text async for text in client.stream_model(BedrockModel.CLAUDE_3_HAIKU, "hi")]
+
+    assert asyncio.run(run()) == ["Hello", ", ", "world"]
+    client._executor.shutdown(wait=True)
+    assert stream.closed
+
+
+def test_stream_model_stops_reader_when_consumer_leaves_early():
+    stream = FakeEventStream([str(i) for i in range(500)])
+    client = make_client(stream)
+
+    async def run():
+        agen = client.stream_model(BedrockModel.CLAUDE_3_HAIKU, "hi")
+        first = await agen.__anext__()
+        await agen.aclose()
+        return first
+
+    assert asyncio.run(run()) == "0"
+    client._executor.shutdown(wait=True)
+    assert stream.closed
+
+
+def test_stream_model_ends_on_stream_error():
+    stream = FakeEventStream(["partial"], error=RuntimeError("connection reset"))
+    client = make_client(stream)
+
+    async def run():
+        return [text async for text in client.stream_model(BedrockModel.CLAUDE_3_HAIKU, "hi")]
+
+    assert asyncio.run(run()) == ["partial"]
+    client._executor.shutdown(wait=True)
+    assert stream.closed
+
+
+class FakeInvokeClient:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        payload = {"content": [{"text": f"answer {self.calls}"}]}
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+
+def test_low_temperature_responses_cached():
+    client = BedrockClient()
+    client.client = FakeInvokeClient()
+
+    async def run():
+        first = await client.invoke_model(BedrockModel.CLAUDE_3_HAIKU, "hi", temperature=0.0)
+        second = await client.invoke_model(BedrockModel.CLAUDE_3_HAIKU, "hi", temperature=0.0)
+        sampled = await client.invoke_model(BedrockModel.CLAUDE_3_HAIKU, "hi", temperature=0.7)
+        return first, second, sampled
+
+    assert asyncio.run(run()) == ("answer 1", "answer 1", "answer 2")
+    assert client.client.calls == 2
+
+
+def test_response_cache_evicts_lru_and_expires(monkeypatch):
+    client = BedrockClient()
+    monkeypatch.setattr(bedrock_client, "_RESPONSE_CACHE_SIZE", 2)
+    now = [1000.0]
+    monkeypatch.setattr(bedrock_client.time, "monotonic", lambda: now[0])
+
+    client._cache_put("a", "A")
+    client._cache_put("b", "B")
+    assert client._cache_get("a") == "A"
+    client._cache_put("c", "C")
+    # "b" was least recently used
+    assert client._cache_get("b") is None
+    assert client._cache_get("a") == "A"
+
+    now[0] += bedrock_client._RESPONSE_CACHE_TTL + 1
+    assert client._cache_get("c") is None
+    assert "c" not in client._response_cache
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.e2b_service import E2BService
+from app.services.sandbox import sandbox_manager as sandbox_manager_module
+
+
+class FakeSandbox:
+    fail = False
+
+    def __init__(self, template, api_key, timeout, metadata=None):
+        if FakeSandbox.fail:
+            raise RuntimeError("boot failed")
+        self.template = template
+        self.timeout = timeout
+        self.closed = False
+
+    def get_host(self, port):
+        return f"{port}-fake.e2b.dev"
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def e2b_settings(monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_E2B", True)
+    monkeypatch.setattr(settings, "E2B_API_KEY", "e2b_test_key")
+    monkeypatch.setattr(settings, "E2B_POOL_SIZE", 0)
+    monkeypatch.setattr(settings, "E2B_PREWARM_SANDBOXES", True)
+    monkeypatch.setattr(sandbox_manager_module, "_get_sandbox_class", lambda: FakeSandbox)
+    monkeypatch.setattr(FakeSandbox, "fail", False)
+
+
+def run_service(scenario):
+    async def run():
+        service = E2BService()
+        try:
+            return await scenario(service)
+        finally:
+            if service.sandbox_manager.cleanup_task:
+                service.sandbox_manager.cleanup_task.cancel()
+    return asyncio.run(run())
+
+
+def test_prewarm_disabled_by_default(e2b_settings, monkeypatch):
+    monkeypatch.setattr(settings, "E2B_PREWARM_SANDBOXES", False)
+
+    async def scenario(service):
+        service.prewarm_sandbox("s1")
+        return dict(service._prewarm_tasks)
+
+    assert run_service(scenario) == {}
+
+
+def test_prewarm_drained_by_write_files(e2b_settings):
+    async def scenario(service):
+        service.prewarm_sandbox("s1")
+        assert "s1" in service._prewarm_tasks
+        await service.write_files("s1", [{"name": "index.html", "content": "<p>hi</p>"}])
+        assert service._prewarm_tasks == {}
+        # The prewarmed sandbox was used, not a second one
+        return len(service.sandbox_manager.sandboxes)
+
+    assert run_service(scenario) == 1
+
+
+def test_prewarm_drained_by_create_sandbox(e2b_settings):
+    async def scenario(service):
+        service.prewarm_sandbox("s1")
+        sandbox_id = await service.create_sandbox("s1")
+        assert service._prewarm_tasks == {}
+        return sandbox_id, list(service.sandbox_manager.sandboxes)
+
+    sandbox_id, sandboxes = run_service(scenario)
+    assert sandboxes == [sandbox_id]
+
+
+def test_prewarm_drained_on_failure(e2b_settings, monkeypatch):
+    monkeypatch.setattr(FakeSandbox, "fail", True)
+
+    async def scenario(service):
+        service.prewarm_sandbox("s1")
+        await asyncio.gather(service._prewarm_tasks["s1"][1], return_exceptions=True)
+        await asyncio.sleep(0)
+        return dict(service._prewarm_tasks), dict(service.sandbox_manager.sandboxes)
+
+    assert run_service(scenario) == ({}, {})
+
+
+def test_prewarm_drained_when_sandbox_reaped(e2b_settings):
+    async def scenario(service):
+        service.prewarm_sandbox("s1")
+        sandbox_id = await service._prewarm_tasks["s1"][1]
+        # Simulate the inactivity sweep removing the unclaimed sandbox
+        await service.sandbox_manager.cleanup_sandbox(sandbox_id)
+        return dict(service._prewarm_tasks)
+
+    assert run_service(scenario) == {}
+
+
+def test_prewarm_drained_by_cleanup_session(e2b_settings):
+    async def scenario(service):
+        service.prewarm_sandbox("s1")
+        assert await service.cleanup_session("s1")
+        return dict(service._prewarm_tasks), dict(service.sandbox_manager.sandboxes)
+
+    assert run_service(scenario) == ({}, {})
+
+
+def test_session_uses_pooled_sandbox_with_short_e2b_timeout(e2b_settings, monkeypatch):
+    monkeypatch.setattr(settings, "E2B_TIMEOUT", 300)
+    monkeypatch.setattr(settings, "E2B_TEMPLATE_ID", "base")
+    monkeypatch.setattr(settings, "E2B_POOL_SIZE", 1)
+
+    async def scenario(service):
+        manager = service.sandbox_manager
+        await manager._refill_pool()
+        pooled = manager._pool[0][2]
+        sandbox_id = await service.create_sandbox("s1")
+        info = manager.sandboxes[sandbox_id]
+        await manager._pool_refill_task
+        return pooled, info, len(manager._pool)
+
+    pooled, info, pool_size = run_service(scenario)
+    assert info.sandbox_instance is pooled
+    assert not pooled.closed
+    assert info.timeout == 300 + sandbox_manager_module._POOL_MAX_IDLE
+    # Refilled with one replacement, not churned
+    assert pool_size == 1
@@ -0,0 +1,40 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models.schemas import AgentRole
+from app.services.orchestration import orchestrator as orchestrator_module
+from app.services.orchestration.models import AgentTask, OrchestrationSession
+from app.services.orchestration.orchestrator import AgentOrchestrator
+
+
+def add_session(orchestrator, session_id, status, age_seconds):
+    created_at = datetime.now() - timedelta(seconds=age_seconds)
+    task = AgentTask(
+        id=f"{session_id}_task",
+        agent_role=AgentRole.ENGINEER,
+        task_type="implementation",
+        description="Implement",
+    )
+    session = OrchestrationSession(id=session_id, status=status, created_at=created_at, tasks=[task])
+    orchestrator.sessions[session_id] = session
+    orchestrator.task_scheduler.add_task(task)
+    return session
+
+
+def test_expiry_heap_removes_only_due_finished_sessions():
+    orchestrator = AgentOrchestrator()
+    retention = orchestrator_module._SESSION_RETENTION_SECONDS
+    old_done = add_session(orchestrator, "old_done", "completed", retention + 60)
+    fresh_done = add_session(orchestrator, "fresh_done", "failed", 60)
+    old_running = add_session(orchestrator, "old_running", "running", retention + 60)
+    # Queued twice (e.g. cancelled, then failed); removed once
+    orchestrator._schedule_expiry(old_done)
+    orchestrator._schedule_expiry(old_done)
+    orchestrator._schedule_expiry(fresh_done)
+
+    asyncio.run(orchestrator._cleanup_old_sessions())
+
+    assert set(orchestrator.sessions) == {"fresh_done", "old_running"}
+    assert "old_done_task" not in orchestrator.task_scheduler.task_registry
+    assert [session_id for _, session_id in orchestrator._expiry_heap] == ["fresh_done"]
+    assert old_running.id in orchestrator.sessions
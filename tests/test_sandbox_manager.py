@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.sandbox import sandbox_manager as sandbox_manager_module
+from app.services.sandbox import SandboxConfig, SandboxManager
+
+
+class FakeSandbox:
+    def __init__(self, template, api_key, timeout, metadata=None):
+        self.template = template
+        self.timeout = timeout
+        self.metadata = metadata
+        self.closed = False
+
+    def get_host(self, port):
+        return f"{port}-fake.e2b.dev"
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def e2b_settings(monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_E2B", True)
+    monkeypatch.setattr(settings, "E2B_API_KEY", "e2b_test_key")
+    monkeypatch.setattr(settings, "E2B_TEMPLATE_ID", "base")
+    monkeypatch.setattr(settings, "E2B_TIMEOUT", 300)
+    monkeypatch.setattr(settings, "E2B_POOL_SIZE", 2)
+    monkeypatch.setattr(sandbox_manager_module, "_get_sandbox_class", lambda: FakeSandbox)
+
+
+def run_manager(scenario):
+    async def run():
+        manager = SandboxManager()
+        try:
+            return await scenario(manager)
+        finally:
+            if manager.cleanup_task:
+                manager.cleanup_task.cancel()
+            if manager._pool_refill_task:
+                await asyncio.gather(manager._pool_refill_task, return_exceptions=True)
+            manager._e2b_executor.shutdown(wait=True)
+    return asyncio.run(run())
+
+
+def test_pooled_sandbox_keeps_its_boot_time_and_timeout(e2b_settings):
+    async def scenario(manager):
+        await manager._refill_pool()
+        created, boot_timeout, pooled = manager._pool[0]
+        assert boot_timeout == 300 + sandbox_manager_module._POOL_MAX_IDLE
+
+        sandbox_id = await manager.create_sandbox("s1", SandboxConfig(template_id="base", timeout=300))
+        info = manager.sandboxes[sandbox_id]
+        assert info.sandbox_instance is pooled
+        assert info.created_monotonic == created
+        assert info.timeout == boot_timeout
+
+    run_manager(scenario)
+
+
+def test_pool_skipped_for_explicit_longer_timeout(e2b_settings):
+    async def scenario(manager):
+        await manager._refill_pool()
+        pooled = [entry[2] for entry in manager._pool]
+
+        # Sessions normally ask for E2B_TIMEOUT; a caller wanting longer gets a fresh VM
+        sandbox_id = await manager.create_sandbox("s1", SandboxConfig(template_id="base", timeout=1800))
+        info = manager.sandboxes[sandbox_id]
+        assert info.sandbox_instance not in pooled
+        assert info.sandbox_instance.timeout == 1800
+        assert info.timeout == 1800
+        # Still usable by default sessions, so kept and not closed
+        assert [entry[2] for entry in manager._pool] == pooled
+        assert not any(sandbox.closed for sandbox in pooled)
+
+    run_manager(scenario)
+
+
+def test_pool_discards_sandboxes_idle_past_budget(e2b_settings):
+    async def scenario(manager):
+        await manager._refill_pool()
+        created, boot_timeout, stale = manager._pool.popleft()
+        aged = time.monotonic() - sandbox_manager_module._POOL_MAX_IDLE - 10
+        manager._pool.appendleft((aged, boot_timeout, stale))
+        fresh = manager._pool[1][2]
+
+        taken = manager._take_pooled_sandbox(SandboxConfig(template_id="base", timeout=300))
+        assert taken[2] is fresh
+        await manager._pool_refill_task
+        return stale
+
+    stale = run_manager(scenario)
+    assert stale.closed
+
+
+def test_pool_ignored_for_other_templates(e2b_settings):
+    async def scenario(manager):
+        await manager._refill_pool()
+        assert manager._take_pooled_sandbox(SandboxConfig(template_id="nodejs", timeout=300)) is None
+        return len(manager._pool)
+
+    assert run_manager(scenario) == 2
+
+
+def test_sweep_removes_only_sandboxes_past_their_deadline(e2b_settings, monkeypatch):
+    monkeypatch.setattr(settings, "E2B_POOL_SIZE", 0)
+
+    async def scenario(manager):
+        expired_id = await manager.create_sandbox("s1", SandboxConfig(template_id="base", timeout=300))
+        live_id = await manager.create_sandbox("s2", SandboxConfig(template_id="base", timeout=1800))
+        expired = manager.sandboxes[expired_id]
+        expired.created_monotonic -= 301
+        # Re-queue at the shifted deadline (as if the sandbox had aged)
+        manager._expiry_heap = sorted((manager._next_deadline(info), sandbox_id)
+                                      for sandbox_id, info in manager.sandboxes.items())
+
+        await manager._cleanup_inactive_sandboxes()
+        assert list(manager.sandboxes) == [live_id]
+        assert expired.sandbox_instance.closed
+        # Nothing else is due, so the next sweep returns without touching the heap
+        heap_before = list(manager._expiry_heap)
+        await manager._cleanup_inactive_sandboxes()
+        assert manager._expiry_heap == heap_before
+
+    run_manager(scenario)
+
+
+def test_run_without_files_serves_placeholder_page(e2b_settings, monkeypatch):
+    monkeypatch.setattr(settings, "E2B_POOL_SIZE", 0)
+
+    async def scenario(manager):
+        sandbox_id = await manager.create_sandbox("s1", SandboxConfig(template_id="base", timeout=300))
+        result = await manager.run_application(sandbox_id)
+        return result, manager.file_managers[sandbox_id], manager.process_managers[sandbox_id]
+
+    result, file_manager, process_manager = run_manager(scenario)
+    assert result["success"]
+    assert result["install_process_id"] is None
+    assert "No files generated" in file_manager.get_file("index.html")["content"]
+    # Only the static server was started
+    assert list(process_manager.processes) == [result["run_process_id"]]
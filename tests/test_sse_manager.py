@@ -0,0 +1,92 @@
+import asyncio
+import base64
+import json
+import zlib
+
+from app.services import sse_manager
+from app.services.sse_manager import SSEManager
+
+
+def collect_events(client_id, produce):
+    """Run produce(manager), then read the client's stream until it ends."""
+    async def run():
+        manager = SSEManager()
+        await produce(manager)
+        await manager.send_stream_end(client_id)
+        events = []
+        async for chunk in sse_manager.event_stream(client_id):
+            for line in chunk.split("\n\n"):
+                if line.startswith("data: "):
+                    events.append(json.loads(line[len("data: "):]))
+        return events
+    return asyncio.run(run())
+
+
+def test_artifacts_batched_in_order():
+    artifacts = [{"name": f"file{i}.py", "content": "x", "size": 1} for i in range(70)]
+
+    async def produce(manager):
+        await manager.send_artifacts_batch("c1", artifacts)
+
+    events = collect_events("c1", produce)
+    assert [e["type"] for e in events] == ["connection", "artifacts_batch", "artifacts_batch", "stream_end"]
+    items = events[1]["items"] + events[2]["items"]
+    assert len(events[1]["items"]) == sse_manager._ARTIFACT_BATCH_MAX_ITEMS
+    assert [a["name"] for a in items] == [a["name"] for a in artifacts]
+    assert "c1" not in sse_manager._queues
+
+
+def test_artifact_batches_split_on_size():
+    big = sse_manager._ARTIFACT_BATCH_MAX_BYTES // 2 + 1
+    batches = list(sse_manager._artifact_batches([{"size": big}, {"size": big}, {"size": 1}]))
+    assert [len(b) for b in batches] == [1, 2]
+
+
+def test_progress_coalesced_and_flushed_before_later_push():
+    async def produce(manager):
+        for progress in (10, 20, 30):
+            await manager.send_progress_update("c2", "g", "running", progress, f"step {progress}")
+        await manager.send_agent_update("c2", "engineer", "working")
+        await manager.send_progress_update("c2", "g", "running", 40, "step 40")
+        await manager.send_error("c2", "boom")
+
+    events = collect_events("c2", produce)
+    assert [e["type"] for e in events] == [
+        "connection", "progress_update", "agent_update", "progress_update", "error",
+    ]
+    assert events[1]["progress"] == 30
+    assert events[3]["progress"] == 40
+    # The stream closes on the error; the trailing stream_end is never read
+    assert "c2" not in sse_manager._pending_progress
+
+
+def test_pending_progress_flushed_after_delay():
+    async def run():
+        await SSEManager().send_progress_update("c3", "g", "running", 50, "half")
+        assert sse_manager._get_queue("c3").empty()
+        await asyncio.sleep(sse_manager._PROGRESS_FLUSH_SECONDS * 2)
+        event, done = sse_manager._get_queue("c3").get_nowait()
+        sse_manager._remove_queue("c3")
+        return json.loads(event[len("data: "):]), done
+
+    data, done = asyncio.run(run())
+    assert data["progress"] == 50
+    assert not done
+
+
+def test_large_artifact_content_round_trips():
+    content = "print('hello world')\n" * 200
+    artifacts = [
+        {"name": "big.py", "content": content, "size": len(content)},
+        {"name": "small.py", "content": "x = 1", "size": 5},
+    ]
+
+    async def produce(manager):
+        await manager.send_artifacts_batch("c4", artifacts)
+
+    items = collect_events("c4", produce)[1]["items"]
+    big, small = items
+    assert big["content_encoding"] == sse_manager._CONTENT_ENCODING
+    assert len(big["content"]) < len(content)
+    assert zlib.decompress(base64.b64decode(big["content"])).decode("utf-8") == content
+    assert small == artifacts[1]
@@ -0,0 +1,178 @@
+import time
+
+import pytest
+from app.core.exceptions import TaskException
+from app.models.schemas import AgentRole
+from app.services.orchestration.models import AgentTask, TaskPriority, TaskStatus
+from app.services.orchestration.task_scheduler import TaskScheduler
+
+
+def make_task(task_id, dependencies=(), priority=TaskPriority.NORMAL, max_retries=3):
+    return AgentTask(
+        id=task_id,
+        agent_role=AgentRole.ENGINEER,
+        task_type="test",
+        description=task_id,
+        priority=priority,
+        dependencies=list(dependencies),
+        max_retries=max_retries,
+    )
+
+
+def ready_ids(scheduler):
+    return [task.id for task in scheduler.get_ready_tasks()]
+
+
+def test_add_out_of_order_waits_for_dependency():
+    scheduler = TaskScheduler()
+    scheduler.add_task(make_task("b", ["a"]))
+    assert ready_ids(scheduler) == []
+    assert scheduler.task_registry["b"].pending_dependencies == 1
+
+    scheduler.add_task(make_task("a"))
+    assert ready_ids(scheduler) == ["a"]
+
+    assert scheduler.mark_task_completed("a") == ["b"]
+    assert ready_ids(scheduler) == ["b"]
+
+
+def test_add_after_dependency_completed_is_ready():
+    scheduler = TaskScheduler()
+    scheduler.add_task(make_task("a"))
+    scheduler.mark_task_completed("a")
+    scheduler.add_task(make_task("b", ["a"]))
+    assert ready_ids(scheduler) == ["b"]
+
+
+def test_ready_tasks_sorted_by_priority():
+    scheduler = TaskScheduler()
+    scheduler.add_task(make_task("low", priority=TaskPriority.LOW))
+    scheduler.add_task(make_task("critical", priority=TaskPriority.CRITICAL))
+    scheduler.add_task(make_task("normal"))
+    assert ready_ids(scheduler) == ["critical", "normal", "low"]
+
+
+def test_complete_releases_only_fully_satisfied_dependents():
+    scheduler = TaskScheduler()
+    scheduler.add_task(make_task("a"))
+    scheduler.add_task(make_task("b"))
+    scheduler.add_task(make_task("c", ["a", "b"]))
+
+    assert scheduler.mark_task_completed("a") == []
+    assert "c" not in ready_ids(scheduler)
+    assert scheduler.mark_task_completed("b") == ["c"]
+    assert ready_ids(scheduler) == ["c"]
+    # Completing twice does not release dependents again
+    assert scheduler.mark_task_completed("b") == []
+    assert scheduler.task_registry["c"].pending_dependencies == 0
+
+
+def test_failed_task_leaves_ready_set_and_blocks_dependents():
+    scheduler = TaskScheduler()
+    scheduler.add_task(make_task("a"))
+    scheduler.add_task(make_task("b", ["a"]))
+
+    scheduler.mark_task_failed("a", "boom")
+    assert ready_ids(scheduler) == []
+    assert scheduler.get_task_status("a") == TaskStatus.FAILED
+    assert scheduler.task_registry["b"].pending_dependencies == 1
+
+
+def test_retry_returns_task_to_ready_set():
+    scheduler = TaskScheduler()
+    scheduler.add_task(make_task("a", max_retries=1))
+    scheduler.add_task(make_task("b", ["a"]))
+
+    scheduler.mark_task_failed("a", "boom")
+    scheduler.retry_task("a")
+    assert ready_ids(scheduler) == ["a"]
+    assert scheduler.task_registry["a"].retry_count == 1
+
+    scheduler.mark_task_failed("a", "boom again")
+    with pytest.raises(TaskException):
+        scheduler.retry_task("a")
+
+    # A retried task whose dependency is unfinished stays out of the ready set
+    scheduler.mark_task_failed("b", "boom")
+    scheduler.retry_task("b")
+    assert "b" not in ready_ids(scheduler)
+
+
+def test_remove_tasks_clears_bookkeeping():
+    scheduler = TaskScheduler()
+    scheduler.add_task(make_task("a"))
+    scheduler.add_task(make_task("b", ["a"]))
+
+    scheduler.remove_tasks(["a", "b", "missing"])
+    assert scheduler.task_registry == {}
+    assert scheduler.dependency_graph == {}
+    assert scheduler.reverse_dependencies == {}
+    assert scheduler.ready_tasks == set()
+
+
+def test_remove_completed_dependency_blocks_surviving_dependent():
+    scheduler = TaskScheduler()
+    scheduler.add_task(make_task("a"))
+    scheduler.add_task(make_task("b", ["a"]))
+    scheduler.mark_task_completed("a")
+    assert ready_ids(scheduler) == ["b"]
+
+    scheduler.remove_tasks(["a"])
+    assert ready_ids(scheduler) == []
+    assert scheduler.task_registry["b"].pending_dependencies == 1
+
+    # Re-adding and completing the dependency releases the survivor
+    scheduler.add_task(make_task("a"))
+    assert scheduler.mark_task_completed("a") == ["b"]
+    assert ready_ids(scheduler) == ["b"]
+
+
+def test_remove_unfinished_dependency_keeps_dependent_blocked():
+    scheduler = TaskScheduler()
+    scheduler.add_task(make_task("a"))
+    scheduler.add_task(make_task("b", ["a"]))
+
+    scheduler.remove_tasks(["a"])
+    assert ready_ids(scheduler) == []
+    assert scheduler.task_registry["b"].pending_dependencies == 1
+    assert scheduler.reverse_dependencies == {"a": {"b"}}
+
+
+def test_started_task_no_longer_ready():
+    scheduler = TaskScheduler()
+    scheduler.add_task(make_task("a"))
+    scheduler.add_task(make_task("b", ["a"]))
+
+    scheduler.mark_task_started("a")
+    assert scheduler.get_task_status("a") == TaskStatus.RUNNING
+    assert ready_ids(scheduler) == []
+    with pytest.raises(TaskException):
+        scheduler.mark_task_started("a")
+    with pytest.raises(TaskException):
+        scheduler.mark_task_started("b")
+
+    assert scheduler.mark_task_completed("a") == ["b"]
+    assert ready_ids(scheduler) == ["b"]
+
+
+def test_running_task_set_by_caller_not_reported_ready():
+    scheduler = TaskScheduler()
+    scheduler.add_task(make_task("a"))
+    scheduler.task_registry["a"].status = TaskStatus.RUNNING
+    assert ready_ids(scheduler) == []
+
+
+def test_started_task_records_monotonic_start_and_retry_resets_it():
+    scheduler = TaskScheduler()
+    scheduler.add_task(make_task("a"))
+    assert scheduler.task_registry["a"].started_monotonic is None
+
+    scheduler.mark_task_started("a")
+    task = scheduler.task_registry["a"]
+    assert task.started_monotonic is not None
+    assert task.started_monotonic <= time.monotonic()
+
+    scheduler.mark_task_failed("a", "boom")
+    scheduler.retry_task("a")
+    assert task.started_monotonic is None
+    assert task.started_at is None